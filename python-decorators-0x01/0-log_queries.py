@@ -1,14 +1,114 @@
-import sqlite3
+import atexit
+import collections
 import functools
-from datetime import datetime
+import json
+import random
+import sqlite3
+import sys
+import threading
+import time
+
+
+class QueryLog:
+    """Buffers query records in memory and writes them as JSON lines.
+
+    Decorated calls only append to a bounded deque (atomic, no lock); a
+    background thread drains it to path every flush_interval seconds. When
+    the buffer is full the oldest records are dropped and counted rather
+    than blocking the caller.
+    """
+
+    def __init__(self, path='queries.log.jsonl', capacity=10000,
+                 flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.buffer = collections.deque(maxlen=capacity)
+        self.dropped = 0
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='query-log',
+                                        daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, entry):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(entry)
+
+    def flush(self):
+        with self._write_lock:
+            entries = []
+            while True:
+                try:
+                    entries.append(self.buffer.popleft())
+                except IndexError:
+                    break
+            if entries:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.writelines(json.dumps(entry, default=repr) + '\n'
+                                 for entry in entries)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
 
+    def close(self):
+        self._stop.set()
+        self.flush()
 
-def log_queries():
-    @functools.wraps()
+
+query_log = None
+
+
+def get_query_log():
+    global query_log
+    if query_log is None:
+        query_log = QueryLog()
+    return query_log
+
+
+def log_queries(func=None, *, sample_rate=1.0, slow_ms=None, log=None):
+    """Record sql, params, duration, row count and caller of each call.
+
+    Usable bare (@log_queries) or configured
+    (@log_queries(sample_rate=0.01, slow_ms=50)): a call is logged when it
+    is sampled, and always when it takes at least slow_ms milliseconds or
+    raises.
+    """
+    if func is None:
+        return functools.partial(log_queries, sample_rate=sample_rate,
+                                 slow_ms=slow_ms, log=log)
+
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        query = kwargs.get('query') or args[0] if args else None
-        timestamp = datetime.now().strftime("%d/%m/%Y, %H:%M:%S")
-        print(f'{timestamp}[LOG] running sql {query}')
+        start = time.perf_counter()
+        error = None
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            slow = slow_ms is not None and duration_ms >= slow_ms
+            if slow or error or random.random() < sample_rate:
+                query = kwargs.get('query') or (args[0] if args else None)
+                caller = sys._getframe(1)
+                (log or get_query_log()).record({
+                    'ts': time.time(),
+                    'sql': query,
+                    'params': kwargs.get('params', args[1] if len(args) > 1 else None),
+                    'duration_ms': round(duration_ms, 3),
+                    'rows': len(result) if isinstance(result, (list, tuple)) else None,
+                    'caller': f'{caller.f_code.co_filename}:{caller.f_lineno} '
+                              f'{caller.f_code.co_name}',
+                    'function': func.__qualname__,
+                    'slow': slow,
+                    'error': error,
+                })
     return wrapper
 
 
@@ -21,7 +121,7 @@ def fetch_all_users(query):
     conn.close()
     return results
 
-# fetch users while logging the query
-
 
-users = fetch_all_users(query="SELECT * FROM users")
+if __name__ == "__main__":
+    # fetch users while logging the query
+    users = fetch_all_users(query="SELECT * FROM users")
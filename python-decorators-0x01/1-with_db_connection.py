@@ -1,17 +1,146 @@
 import sqlite3
 import functools
+import queue
+import threading
+
+
+class ConnectionPool:
+    """Reusable sqlite3 connections for with_db_connection.
+
+    Connections are opened once with WAL journaling, a busy timeout and a
+    statement cache, then handed out again instead of being reopened on
+    every call. per_thread=True keeps one connection per thread; otherwise
+    up to max_size connections are shared and callers wait up to timeout
+    seconds for a free one. close_all closes idle connections at once and
+    the ones still checked out when they are released.
+    """
+
+    def __init__(self, database='user.db', max_size=8, per_thread=False,
+                 timeout=5.0, busy_timeout_ms=5000, wal=True,
+                 cached_statements=256):
+        self.database = database
+        self.max_size = max_size
+        self.per_thread = per_thread
+        self.timeout = timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.wal = wal
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []
+        self._open = 0
+        self._in_use = set()
+        self._retired = set()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database,
+                               timeout=self.busy_timeout_ms / 1000,
+                               check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        # settings applied once per connection, not once per call
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        if self.wal:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def _checkout(self, conn):
+        with self._lock:
+            self._in_use.add(conn)
+        return conn
+
+    def acquire(self):
+        if self.per_thread:
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = self._connect()
+            return self._checkout(conn)
+        try:
+            return self._checkout(self._idle.get_nowait())
+        except queue.Empty:
+            pass
+        # reserve the slot before connecting so concurrent callers cannot
+        # all pass the size check
+        with self._lock:
+            can_open = self._open < self.max_size
+            if can_open:
+                self._open += 1
+        if can_open:
+            try:
+                return self._checkout(self._connect())
+            except BaseException:
+                with self._lock:
+                    self._open -= 1
+                raise
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f'no connection free after {self.timeout}s')
+        return self._checkout(conn)
+
+    def release(self, conn):
+        # like the old conn.close(), drop anything the call did not commit
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._in_use.discard(conn)
+            retired = conn in self._retired
+            if retired:
+                self._retired.discard(conn)
+                if not self.per_thread:
+                    self._open -= 1
+        if retired:
+            # close_all ran while this call was using it
+            conn.close()
+        elif not self.per_thread:
+            self._idle.put(conn)
+
+    def close_all(self):
+        with self._lock:
+            conns, self._all = self._all, []
+            if self.per_thread:
+                idle = [conn for conn in conns if conn not in self._in_use]
+            else:
+                # whatever is not waiting in the queue is out with a caller
+                idle = []
+                while True:
+                    try:
+                        idle.append(self._idle.get_nowait())
+                    except queue.Empty:
+                        break
+                self._open -= len(idle)
+            self._retired.update(conn for conn in conns if conn not in idle)
+            self._local = threading.local()
+        # checked-out connections are closed by release instead
+        for conn in idle:
+            conn.close()
+
+
+pool = ConnectionPool()
+
+
+def configure_pool(**options):
+    global pool
+    pool.close_all()
+    pool = ConnectionPool(**options)
+    return pool
 
 
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # make connection
-        conn = sqlite3.connect('user.db')
+        # borrow a connection from the pool; configure_pool may swap the
+        # module pool meanwhile, so give it back to the one it came from
+        source = pool
+        conn = source.acquire()
         try:
             result = func(conn, *args, **kwargs)
-        # close connection
+        # hand it back for the next call
         finally:
-            conn.close()
+            source.release(conn)
         return result
     return wrapper
 
@@ -23,6 +152,7 @@ def get_user_by_id(conn, user_id):
     return cursor.fetchone()
 
 
-# Fetch user by ID with automatic connection handling
-user = get_user_by_id(user_id=1)
-print(user)
+if __name__ == "__main__":
+    # Fetch user by ID with automatic connection handling
+    user = get_user_by_id(user_id=1)
+    print(user)
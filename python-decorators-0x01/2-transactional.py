@@ -1,19 +1,265 @@
+import atexit
 import functools
-from 1-with_db_connection import with_db_connection
+import queue
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
 
+with_db_connection = __import__('1-with_db_connection').with_db_connection
 
+TABLE_NAME = r'(?:["`\[]?\w+["`\]]?\.)?["`\[]?(\w+)'
+WRITE_TARGET = re.compile(
+    r'(?:INSERT|REPLACE)(?:\s+OR\s+\w+)?\s+INTO\s+' + TABLE_NAME
+    + r'|UPDATE(?:\s+OR\s+\w+)?\s+' + TABLE_NAME
+    + r'|DELETE\s+FROM\s+' + TABLE_NAME,
+    re.IGNORECASE)
+LEADING_COMMENTS = re.compile(r'(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*',
+                              re.DOTALL)
+NO_WRITE = re.compile(
+    r'(?:SELECT|VALUES|EXPLAIN|BEGIN|COMMIT|END|ROLLBACK|SAVEPOINT|RELEASE'
+    r'|PRAGMA)\b', re.IGNORECASE)
+WRITE_KEYWORD = re.compile(r'\b(?:INSERT|UPDATE|DELETE|REPLACE)\b',
+                           re.IGNORECASE)
+
+# reported instead of a table name when a write's target cannot be parsed
+ALL_TABLES = '*'
+
+# called with the set of table names written by each committed transaction
+commit_listeners = []
+
+
+def on_commit(listener):
+    commit_listeners.append(listener)
+    return listener
+
+
+def written_table(statement):
+    """Return the table a statement writes, None if it changes no data, or
+    ALL_TABLES for writes whose target is not parsed (WITH ... UPDATE, DDL,
+    ATTACH, ...), so listeners can err on the side of dropping too much."""
+    statement = statement[LEADING_COMMENTS.match(statement).end():]
+    if not statement:
+        return None
+    match = WRITE_TARGET.match(statement)
+    if match:
+        return next(name for name in match.groups() if name).lower()
+    if NO_WRITE.match(statement):
+        return None
+    if statement[:4].upper() == 'WITH' and not WRITE_KEYWORD.search(statement):
+        return None
+    return ALL_TABLES
+
+
+def notify_commit(written):
+    if written:
+        for listener in commit_listeners:
+            listener(written)
+
+
+class GroupCommitWriter:
+    """Coalesces transactional calls from many callers into one commit.
+
+    A single writer thread owns its own connection. It collects calls for up
+    to window seconds (or max_batch calls), runs each one inside its own
+    SAVEPOINT so a failing call is rolled back alone, and then commits the
+    whole group at once. Every caller gets a Future with its own result or
+    exception; if the final COMMIT fails, every call in the group fails.
+    Writes still queued at interpreter exit are committed by an atexit
+    hook, and if the writer thread dies every pending call fails rather
+    than waiting forever.
+    """
+
+    def __init__(self, database='user.db', window=0.005, max_batch=256,
+                 busy_timeout_ms=5000, wal=True):
+        self.database = database
+        self.window = window
+        self.max_batch = max_batch
+        self.busy_timeout_ms = busy_timeout_ms
+        self.wal = wal
+        self.stats = {'groups': 0, 'calls': 0, 'failed': 0}
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run,
+                                        name='group-commit', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('group commit writer is closed')
+            self._queue.put((func, args, kwargs, future))
+        return future
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        atexit.unregister(self.close)
+        self._thread.join()
+
+    def _connect(self):
+        # autocommit mode: the writer issues BEGIN/SAVEPOINT/COMMIT itself
+        conn = sqlite3.connect(self.database, isolation_level=None,
+                               timeout=self.busy_timeout_ms / 1000)
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        if self.wal:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+    def _collect(self, first):
+        group = [first]
+        deadline = time.monotonic() + self.window
+        while len(group) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = (self._queue.get(timeout=remaining) if remaining > 0
+                        else self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if item is None:
+                # finish this group, then stop
+                self._queue.put(None)
+                break
+            group.append(item)
+        return group
+
+    def _run(self):
+        group = []
+        try:
+            conn = self._connect()
+            try:
+                while True:
+                    first = self._queue.get()
+                    if first is None:
+                        break
+                    group = self._collect(first)
+                    self._commit_group(conn, group)
+            finally:
+                conn.close()
+        except BaseException as e:
+            self._abandon(group, e)
+            raise
+
+    def _abandon(self, group, cause):
+        """Fail the in-flight group and everything still queued."""
+        with self._lock:
+            self._closed = True
+        error = RuntimeError(f'group commit writer stopped: {cause!r}')
+        error.__cause__ = cause
+        items = list(group)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                items.append(item)
+        for *_, future in items:
+            if not future.done():
+                future.set_exception(error)
+
+    def _commit_group(self, conn, group):
+        current = set()
+
+        def track(statement):
+            table = written_table(statement)
+            if table:
+                current.add(table)
+
+        conn.set_trace_callback(track)
+        outcomes = []
+        written = set()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for func, args, kwargs, future in group:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                current.clear()
+                conn.execute('SAVEPOINT group_call')
+                try:
+                    result = func(conn, *args, **kwargs)
+                except BaseException as e:
+                    # even SystemExit/KeyboardInterrupt belong to this caller
+                    # and must not take the writer thread down
+                    conn.execute('ROLLBACK TO group_call')
+                    conn.execute('RELEASE group_call')
+                    outcomes.append((future, False, e))
+                else:
+                    conn.execute('RELEASE group_call')
+                    outcomes.append((future, True, result))
+                    written |= current
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f'Group commit error. rolled back due to {e}')
+            outcomes = [(future, False, e) for *_, future in group
+                        if not future.cancelled()]
+            written = set()
+        finally:
+            conn.set_trace_callback(None)
+        self.stats['groups'] += 1
+        self.stats['calls'] += len(outcomes)
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                self.stats['failed'] += 1
+                future.set_exception(value)
+        try:
+            notify_commit(written)
+        except Exception as e:
+            print(f'Commit listener error: {e}')
+
+
+def transactional(func=None, *, group=None, wait=True):
+    """Commit func's writes, or roll them back if it raises.
+
+    With group=GroupCommitWriter(...) the call is handed to the writer's
+    connection instead of taking conn from the caller, and commits together
+    with other callers' writes. wait=False returns the Future so a single
+    thread can queue many writes before collecting their results.
+    """
+    if func is None:
+        return functools.partial(transactional, group=group, wait=wait)
+
+    if group is not None:
+        @functools.wraps(func)
+        def group_wrapper(*args, **kwargs):
+            future = group.submit(func, *args, **kwargs)
+            return future.result() if wait else future
+        return group_wrapper
 
-def transactional(func):
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
+        written = set()
+
+        def track(statement):
+            table = written_table(statement)
+            if table:
+                written.add(table)
+
+        # see every statement the call runs so commits can report their tables
+        conn.set_trace_callback(track)
         try:
             result = func(conn, *args, **kwargs)
             conn.commit()
-            return result
         except Exception as e:
             conn.rollback()
             print(f'Transaction error. rolled back due to {e}')
             raise
+        finally:
+            conn.set_trace_callback(None)
+        notify_commit(written)
+        return result
     return wrapper
 
 
@@ -24,5 +270,6 @@ def update_user_email(conn, user_id, new_email):
     cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id)) 
 
 
-# Update user's email with automatic transaction handling 
-update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
+if __name__ == "__main__":
+    # Update user's email with automatic transaction handling 
+    update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
@@ -1,34 +1,173 @@
-import sqlite3
+import asyncio
 import functools
+import inspect
+import random
+import sqlite3
+import threading
 import time
 
+with_db_connection = __import__('1-with_db_connection').with_db_connection
+
+
+TRANSIENT_MESSAGES = ('database is locked', 'database table is locked',
+                      'database is busy')
+
+
+def is_retryable(error):
+    """Only transient lock contention is worth retrying; anything else
+    (syntax errors, missing tables, constraint violations) fails the same
+    way every time."""
+    return (isinstance(error, sqlite3.OperationalError)
+            and any(m in str(error).lower() for m in TRANSIENT_MESSAGES))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling func while the breaker is open."""
+
+
+class CircuitBreaker:
+    """Fails fast after failure_threshold consecutive retryable failures.
+
+    Once open, calls are rejected until reset_timeout seconds have passed;
+    then a single trial call is let through (half-open) and its outcome
+    closes or re-opens the breaker. A trial that ends without a verdict
+    (interrupted or cancelled) is released so the next call can retry it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
 
-def with_db_connection(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('user.db')
-        try:
-            return func(conn, args, kwargs)
-        finally:
-            conn.close()
-    return wrapper
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
 
+    def allow(self):
+        """Raise CircuitOpenError or let the call through; returns True
+        when the call is the half-open trial."""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return False
+            if state == 'half-open' and not self._trial:
+                self._trial = True
+                return True
+            raise CircuitOpenError(
+                f'circuit open after {self.failures} failures')
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+    def release(self):
+        with self._lock:
+            self._trial = False
+
+
+def backoff(attempt, delay, max_delay):
+    """Full jitter: a uniform sleep up to the capped exponential step."""
+    return random.uniform(0, min(max_delay, delay * 2 ** (attempt - 1)))
+
+
+def retry_on_failure(retries=3, delay=2, max_delay=30.0, deadline=None,
+                     retry_if=is_retryable, breaker=None):
+    """Retry func on retryable errors with jittered exponential backoff.
+
+    Non-retryable errors are raised immediately, there is no sleep after the
+    last attempt, and no sleep is started that would overrun deadline
+    seconds measured from the first attempt. Coroutine functions get an
+    async wrapper that awaits asyncio.sleep instead of blocking.
+    """
+    def before_call():
+        return breaker is not None and breaker.allow()
+
+    def pause_after(error, attempt, start):
+        """Seconds to sleep before the next attempt, or None to give up."""
+        retryable = retry_if(error)
+        if breaker is not None:
+            # a non-retryable error still means the database answered
+            if retryable:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        pause = None
+        if retryable and attempt < retries:
+            pause = backoff(attempt, delay, max_delay)
+            if (deadline is not None
+                    and time.monotonic() - start + pause > deadline):
+                pause = None
+        if pause is None:
+            print(f'attempt {attempt} failed: {error}, giving up')
+        else:
+            print(f'attempt {attempt} failed: {error}, '
+                  f'retrying in {pause:.2f}s')
+        return pause
+
+    def end_trial(trial):
+        if trial:
+            breaker.release()
+
+    def on_success():
+        if breaker is not None:
+            breaker.record_success()
 
-def retry_on_failure(retries=3, delay=2):
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.monotonic()
+                for attempt in range(1, retries + 1):
+                    trial = before_call()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as e:
+                        pause = pause_after(e, attempt, start)
+                        if pause is None:
+                            raise
+                    else:
+                        on_success()
+                        return result
+                    finally:
+                        # cancelled or interrupted calls give no verdict,
+                        # but must not hold the half-open trial forever
+                        end_trial(trial)
+                    await asyncio.sleep(pause)
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            last_error = None
-            for attempts in range(1, retries + 1):
+            start = time.monotonic()
+            for attempt in range(1, retries + 1):
+                trial = before_call()
                 try:
-                    print(f'attempting {attempts}')
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except Exception as e:
-                    last_error = e
-                    print(f'error-{e}, retrying in {delay}s')
-                    time.sleep(delay)
-            print('all retries failed')
-            raise last_error
+                    pause = pause_after(e, attempt, start)
+                    if pause is None:
+                        raise
+                else:
+                    on_success()
+                    return result
+                finally:
+                    end_trial(trial)
+                time.sleep(pause)
         return wrapper
     return decorator
 
@@ -41,6 +180,7 @@ def fetch_users_with_retry(conn):
     return cursor.fetchall()
 
 
-# attempt to fetch users with automatic retry on failure
-users = fetch_users_with_retry()
-print(users)
+if __name__ == "__main__":
+    # attempt to fetch users with automatic retry on failure
+    users = fetch_users_with_retry()
+    print(users)
@@ -1,46 +1,234 @@
 import functools
-import sqlite3
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
 
+transactional = __import__('2-transactional')
+with_db_connection = transactional.with_db_connection
+on_commit = transactional.on_commit
+ALL_TABLES = transactional.ALL_TABLES
 
-def with_db_connection(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('user.db')
+
+QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+TABLE_SOURCE = re.compile(r'\b(?:FROM|JOIN)\s+', re.IGNORECASE)
+TABLE_REF = re.compile(transactional.TABLE_NAME + r'["`\]]?')
+ALIAS = re.compile(r'\s+(?:AS\s+)?(\w+)', re.IGNORECASE)
+LIST_SEPARATOR = re.compile(r'\s*,\s*')
+NOT_ALIAS = {'where', 'join', 'inner', 'left', 'right', 'full', 'cross',
+             'natural', 'outer', 'on', 'using', 'group', 'order', 'limit',
+             'having', 'union', 'except', 'intersect', 'window', 'offset'}
+
+
+def closing_paren(query, pos):
+    """Index just past the parenthesis that closes the one at ``pos``."""
+    depth = 0
+    for i in range(pos, len(query)):
+        if query[i] == '(':
+            depth += 1
+        elif query[i] == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return len(query)
+
+
+def read_tables(query):
+    """Tables named after FROM or JOIN, including comma-separated lists
+    such as ``FROM users u, posts p``."""
+    tables = set()
+    for source in TABLE_SOURCE.finditer(query):
+        pos = source.end()
+        while True:
+            if query.startswith('(', pos):
+                # a subquery: its own FROM is matched separately
+                pos = closing_paren(query, pos)
+            else:
+                ref = TABLE_REF.match(query, pos)
+                if ref is None:
+                    break
+                tables.add(ref.group(1).lower())
+                pos = ref.end()
+            alias = ALIAS.match(query, pos)
+            if alias and alias.group(1).lower() not in NOT_ALIAS:
+                pos = alias.end()
+            separator = LIST_SEPARATOR.match(query, pos)
+            if separator is None:
+                break
+            pos = separator.end()
+    return tables
+
+
+def normalize_sql(query):
+    # collapse whitespace and case outside string literals so trivially
+    # different spellings of one query share a cache entry
+    parts = QUOTED.split(query.strip().rstrip(';'))
+    return ''.join(part if i % 2 else re.sub(r'\s+', ' ', part).lower()
+                   for i, part in enumerate(parts))
+
+
+def result_size(result):
+    size = sys.getsizeof(result)
+    if isinstance(result, (list, tuple)):
+        for row in result:
+            size += sys.getsizeof(row)
+            if isinstance(row, (list, tuple)):
+                size += sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+class QueryCache:
+    """LRU cache of query results keyed on normalized SQL plus parameters.
+
+    Bounded by max_entries and max_bytes, entries expire after ttl seconds
+    (None keeps them until evicted), and invalidate_tables drops every
+    entry that read from a written table.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 << 20, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (result, expires_at, size, tables, thaw)
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(
+            ('hits', 'misses', 'evictions', 'expirations', 'invalidations'), 0)
+
+    @staticmethod
+    def make_key(query, params=()):
+        """Cache key for query and params, or None when params cannot be
+        hashed (the call then bypasses the cache)."""
+        if isinstance(params, Mapping):
+            # named placeholders: the values matter, not just the names
+            params = tuple(sorted(params.items()))
+        else:
+            params = tuple(params or ())
+        key = normalize_sql(query), params
         try:
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            conn.close()
-    return wrapper
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _drop(self, key):
+        result, expires_at, size, tables, thaw = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return False, None
+            if entry[1] is not None and entry[1] < time.monotonic():
+                self._drop(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            result, thaw = entry[0], entry[4]
+        # every hit gets its own list, so callers cannot change the entry
+        return True, result if thaw is None else thaw(result)
+
+    def put(self, key, result, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+        tables = read_tables(key[0])
+        # keep an immutable copy; the caller still owns the list it got
+        thaw = None
+        if isinstance(result, list):
+            result, thaw = tuple(result), list
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (result, expires_at, size, tables, thaw)
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.stats['evictions'] += 1
 
+    def invalidate_tables(self, tables):
+        with self._lock:
+            if ALL_TABLES in tables:
+                self.stats['invalidations'] += len(self._entries)
+                self._entries.clear()
+                self._by_table.clear()
+                self._bytes = 0
+                return
+            for table in tables:
+                for key in list(self._by_table.get(table.lower(), ())):
+                    self._drop(key)
+                    self.stats['invalidations'] += 1
 
-query_cache = []
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
 
+    def info(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries),
+                        bytes=self._bytes)
+
+
+query_cache = QueryCache()
+
+# writes committed through @transactional drop the entries they made stale
+on_commit(query_cache.invalidate_tables)
+
+
+def cache_query(func=None, *, ttl=None, cache=None):
+    if func is None:
+        return functools.partial(cache_query, ttl=ttl, cache=cache)
+    store = cache or query_cache
 
-def cache_query(func):
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
         query = kwargs.get('query') or (args[0] if args else None)
-        if query in query_cache:
-            print(f'executing cached queries{query}')
-            return query_cache[query]
-        print(f'executing and caching {query}')
+        params = kwargs.get('params') or (args[1] if len(args) > 1 else ())
+        key = store.make_key(query, params)
+        if key is None:
+            return func(conn, *args, **kwargs)
+        hit, result = store.get(key)
+        if hit:
+            return result
         result = func(conn, *args, **kwargs)
-        query_cache[query] = result
+        store.put(key, result, ttl)
         return result
     return wrapper
 
 
 @with_db_connection
 @cache_query
-def fetch_users_with_cache(conn, query):
+def fetch_users_with_cache(conn, query, params=()):
     cursor = conn.cursor()
-    cursor.execute(query)
+    cursor.execute(query, params)
     return cursor.fetchall()
 
 
-# First call will cache the result
-users = fetch_users_with_cache(query="SELECT * FROM users")
+if __name__ == "__main__":
+    # First call will cache the result
+    users = fetch_users_with_cache(query="SELECT * FROM users")
 
-# Second call will use the cached result
-users_again = fetch_users_with_cache(query="SELECT * FROM users")
+    # Second call will use the cached result
+    users_again = fetch_users_with_cache(query="SELECT * FROM users")
+    print(query_cache.info())
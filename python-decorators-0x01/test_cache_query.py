@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Unit tests for the cache_query decorator and QueryCache"""
+
+import sqlite3
+import time
+import unittest
+
+cache_query = __import__('4-cache_query')
+QueryCache = cache_query.QueryCache
+
+
+class TestCacheKey(unittest.TestCase):
+    """Test case class for cached lookups with bound parameters"""
+
+    def setUp(self):
+        """Open an in-memory users table and a private cache"""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE users (id INTEGER, name TEXT)')
+        self.conn.executemany('INSERT INTO users VALUES (?, ?)',
+                              [(1, 'ada'), (2, 'bob')])
+        self.cache = QueryCache()
+
+        @cache_query.cache_query(cache=self.cache)
+        def fetch(conn, query, params=()):
+            return conn.execute(query, params).fetchall()
+        self.fetch = fetch
+
+    def tearDown(self):
+        """Close the connection"""
+        self.conn.close()
+
+    def test_positional_params(self):
+        """Different positional values get different entries"""
+        query = 'SELECT name FROM users WHERE id = ?'
+        self.assertEqual(self.fetch(self.conn, query, (1,)), [('ada',)])
+        self.assertEqual(self.fetch(self.conn, query, (2,)), [('bob',)])
+        self.assertEqual(self.fetch(self.conn, query, (1,)), [('ada',)])
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_named_params(self):
+        """Different named values get different entries"""
+        query = 'SELECT name FROM users WHERE id = :id'
+        self.assertEqual(self.fetch(self.conn, query, {'id': 1}), [('ada',)])
+        self.assertEqual(self.fetch(self.conn, query, {'id': 2}), [('bob',)])
+        self.assertEqual(self.fetch(self.conn, query, {'id': 2}), [('bob',)])
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_named_param_order_is_irrelevant(self):
+        """Mappings with the same items share one key"""
+        query = 'SELECT 1 WHERE :a = :b'
+        self.assertEqual(QueryCache.make_key(query, {'a': 1, 'b': 2}),
+                         QueryCache.make_key(query, {'b': 2, 'a': 1}))
+
+    def test_hits_are_independent_copies(self):
+        """Mutating a returned result does not change the cached one"""
+        query = 'SELECT name FROM users WHERE id = ?'
+        first = self.fetch(self.conn, query, (1,))
+        first.append(('mallory',))
+        second = self.fetch(self.conn, query, (1,))
+        second.append(('eve',))
+        self.assertEqual(self.fetch(self.conn, query, (1,)), [('ada',)])
+        self.assertEqual(self.cache.stats['hits'], 2)
+
+    def test_unhashable_params_bypass_cache(self):
+        """Unhashable params skip the cache instead of raising"""
+        self.assertIsNone(QueryCache.make_key('SELECT ?', ([1],)))
+        query = 'SELECT name FROM users WHERE id = :id'
+        self.assertEqual(
+            self.fetch(self.conn, query, {'id': 1, 'unused': [0]}),
+            [('ada',)])
+        self.assertEqual(self.cache.info()['entries'], 0)
+
+
+class TestQueryCache(unittest.TestCase):
+    """Test case class for QueryCache bounds and invalidation"""
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first"""
+        cache = QueryCache(max_entries=2)
+        a, b, c = (QueryCache.make_key(f'SELECT {n} FROM t') for n in 'abc')
+        cache.put(a, [1])
+        cache.put(b, [2])
+        self.assertEqual(cache.get(a), (True, [1]))
+        cache.put(c, [3])
+        self.assertEqual(cache.get(b), (False, None))
+        self.assertEqual(cache.get(a), (True, [1]))
+        self.assertEqual(cache.stats['evictions'], 1)
+
+    def test_byte_bound(self):
+        """Entries are evicted to stay under max_bytes"""
+        key = QueryCache.make_key('SELECT x FROM t')
+        size = cache_query.result_size([1])
+        cache = QueryCache(max_bytes=size)
+        cache.put(key, [1])
+        cache.put(QueryCache.make_key('SELECT y FROM t'), [2])
+        self.assertEqual(cache.info()['entries'], 1)
+        self.assertLessEqual(cache.info()['bytes'], size)
+
+    def test_ttl_expiry(self):
+        """Expired entries miss and are counted"""
+        cache = QueryCache(ttl=0.01)
+        key = QueryCache.make_key('SELECT 1 FROM t')
+        cache.put(key, [1])
+        self.assertTrue(cache.get(key)[0])
+        time.sleep(0.02)
+        self.assertEqual(cache.get(key), (False, None))
+        self.assertEqual(cache.stats['expirations'], 1)
+
+    def test_invalidate_tables(self):
+        """Writes to a table drop only the entries that read it"""
+        cache = QueryCache()
+        users = QueryCache.make_key('SELECT * FROM users')
+        joined = QueryCache.make_key(
+            'SELECT * FROM posts JOIN Users ON users.id = posts.user_id')
+        posts = QueryCache.make_key('SELECT * FROM posts')
+        for key in (users, joined, posts):
+            cache.put(key, [])
+        cache.invalidate_tables({'USERS'})
+        self.assertFalse(cache.get(users)[0])
+        self.assertFalse(cache.get(joined)[0])
+        self.assertTrue(cache.get(posts)[0])
+        self.assertEqual(cache.stats['invalidations'], 2)
+
+    def test_comma_separated_from_list(self):
+        """Every table in a FROM list or subquery is tracked"""
+        self.assertEqual(
+            cache_query.read_tables(
+                'select * from users u, posts as p, (select * from tags) t, '
+                'main."Logs" where u.id = p.user_id'),
+            {'users', 'posts', 'tags', 'logs'})
+        cache = QueryCache()
+        key = QueryCache.make_key('SELECT * FROM posts p, users u')
+        cache.put(key, [])
+        cache.invalidate_tables({'users'})
+        self.assertFalse(cache.get(key)[0])
+
+    def test_unparsed_write_clears_everything(self):
+        """ALL_TABLES drops every entry"""
+        cache = QueryCache()
+        for table in ('users', 'posts'):
+            cache.put(QueryCache.make_key(f'SELECT * FROM {table}'), [])
+        cache.put(QueryCache.make_key('SELECT 1'), [1])
+        cache.invalidate_tables({cache_query.ALL_TABLES})
+        self.assertEqual(cache.info()['entries'], 0)
+        self.assertEqual(cache.stats['invalidations'], 3)
+
+
+class TestCommitInvalidation(unittest.TestCase):
+    """Test case class for invalidation by transactional commits"""
+
+    def setUp(self):
+        """Cache a users query on an in-memory database"""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE users (id INTEGER, name TEXT)')
+        self.conn.execute("INSERT INTO users VALUES (1, 'ada')")
+        self.conn.commit()
+        self.cache = QueryCache()
+        self.cache_key = QueryCache.make_key('SELECT * FROM users')
+        self.cache.put(self.cache_key, [(1, 'ada')])
+        cache_query.on_commit(self.cache.invalidate_tables)
+
+    def tearDown(self):
+        """Drop the listener and close the connection"""
+        cache_query.transactional.commit_listeners.remove(
+            self.cache.invalidate_tables)
+        self.conn.close()
+
+    def commit(self, sql, script=False):
+        """Run sql in a transactional call"""
+        @cache_query.transactional.transactional
+        def write(conn):
+            if script:
+                conn.executescript(sql)
+            else:
+                conn.execute(sql)
+        write(self.conn)
+
+    def test_writes_invalidate(self):
+        """CTE writes, DDL and executescript all drop the users entry"""
+        for sql, script in (
+                ("WITH t AS (SELECT 2) UPDATE users SET name = 'bo'", False),
+                ('CREATE TABLE posts (id INTEGER)', False),
+                ("UPDATE users SET name = 'cy'; SELECT 1;", True)):
+            with self.subTest(sql=sql):
+                self.cache.put(self.cache_key, [(1, 'ada')])
+                self.commit(sql, script)
+                self.assertFalse(self.cache.get(self.cache_key)[0])
+
+    def test_read_only_commit_keeps_entry(self):
+        """A transaction that writes nothing leaves the cache alone"""
+        self.commit('WITH t AS (SELECT 1) SELECT * FROM t')
+        self.assertTrue(self.cache.get(self.cache_key)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Unit tests for the log_queries decorator and QueryLog"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+log_queries = __import__('0-log_queries')
+QueryLog = log_queries.QueryLog
+
+
+class TestLogQueries(unittest.TestCase):
+    """Test case class for which calls log_queries records"""
+
+    def setUp(self):
+        """Create a log that only flushes when asked"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log = QueryLog(os.path.join(self.tmp.name, 'queries.jsonl'),
+                            flush_interval=3600)
+
+    def tearDown(self):
+        """Stop the log"""
+        self.log.close()
+
+    def test_sample_rate(self):
+        """sample_rate=1 logs every call and sample_rate=0 none"""
+        for rate, expected in ((1.0, 3), (0.0, 0)):
+            with self.subTest(sample_rate=rate):
+                self.log.buffer.clear()
+
+                @log_queries.log_queries(sample_rate=rate, log=self.log)
+                def run(query, params=None):
+                    return [(1,), (2,)]
+                for _ in range(3):
+                    run('SELECT 1', (7,))
+                self.assertEqual(len(self.log.buffer), expected)
+
+    def test_record_fields(self):
+        """A record carries the sql, params and row count of the call"""
+        @log_queries.log_queries(log=self.log)
+        def run(query, params=None):
+            return [(1,), (2,)]
+        run('SELECT * FROM users WHERE id = ?', params=(7,))
+        entry = self.log.buffer[0]
+        self.assertEqual(entry['sql'], 'SELECT * FROM users WHERE id = ?')
+        self.assertEqual(entry['params'], (7,))
+        self.assertEqual(entry['rows'], 2)
+        self.assertFalse(entry['slow'])
+        self.assertIsNone(entry['error'])
+
+    def test_slow_call_always_logged(self):
+        """A call at or over slow_ms is logged even when not sampled"""
+        @log_queries.log_queries(sample_rate=0.0, slow_ms=5, log=self.log)
+        def run(query, pause):
+            time.sleep(pause)
+            return []
+        run('SELECT 1', 0)
+        run('SELECT 2', 0.02)
+        self.assertEqual([entry['sql'] for entry in self.log.buffer],
+                         ['SELECT 2'])
+        self.assertTrue(self.log.buffer[0]['slow'])
+
+    def test_error_always_logged(self):
+        """A call that raises is logged even when not sampled"""
+        @log_queries.log_queries(sample_rate=0.0, log=self.log)
+        def run(query):
+            raise ValueError('bad query')
+        with self.assertRaises(ValueError):
+            run('SELEC 1')
+        self.assertEqual(len(self.log.buffer), 1)
+        self.assertIn('bad query', self.log.buffer[0]['error'])
+
+    def test_full_buffer_drops_oldest(self):
+        """A full buffer drops the oldest records and counts them"""
+        log = QueryLog(os.path.join(self.tmp.name, 'small.jsonl'),
+                       capacity=2, flush_interval=3600)
+        self.addCleanup(log.close)
+        for n in range(5):
+            log.record({'n': n})
+        self.assertEqual(log.dropped, 3)
+        self.assertEqual([entry['n'] for entry in log.buffer], [3, 4])
+
+    def test_flush_writes_json_lines(self):
+        """flush appends one JSON object per line and empties the buffer"""
+        self.log.record({'sql': 'SELECT 1', 'params': None})
+        self.log.record({'sql': 'SELECT 2', 'params': object()})
+        self.log.flush()
+        self.log.record({'sql': 'SELECT 3', 'params': None})
+        self.log.flush()
+        self.assertEqual(len(self.log.buffer), 0)
+        with open(self.log.path, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual([entry['sql'] for entry in entries],
+                         ['SELECT 1', 'SELECT 2', 'SELECT 3'])
+        self.assertTrue(entries[1]['params'].startswith('<object'))
+
+
+if __name__ == '__main__':
+    unittest.main()
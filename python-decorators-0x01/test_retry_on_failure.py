@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Unit tests for retry_on_failure and CircuitBreaker"""
+
+import asyncio
+import sqlite3
+import time
+import unittest
+from unittest.mock import patch
+
+retry = __import__('3-retry_on_failure')
+
+LOCKED = sqlite3.OperationalError('database is locked')
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test case class for the half-open trial of CircuitBreaker"""
+
+    def setUp(self):
+        """Build a breaker that opens after one failure"""
+        self.breaker = retry.CircuitBreaker(failure_threshold=1,
+                                            reset_timeout=0.01)
+
+    def open_breaker(self):
+        """Trip the breaker and wait until it is half-open"""
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        time.sleep(0.02)
+        self.assertEqual(self.breaker.state, 'half-open')
+
+    def call(self, func):
+        """Run func through retry_on_failure with the breaker attached"""
+        wrapped = retry.retry_on_failure(retries=1,
+                                         breaker=self.breaker)(func)
+        with patch('builtins.print'):
+            return wrapped()
+
+    def test_trial_success_closes(self):
+        """A successful trial closes the breaker"""
+        self.open_breaker()
+        self.assertEqual(self.call(lambda: 'ok'), 'ok')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_trial_retryable_failure_reopens(self):
+        """A retryable failure during the trial re-opens the breaker"""
+        self.open_breaker()
+
+        def locked():
+            raise LOCKED
+        with self.assertRaises(sqlite3.OperationalError):
+            self.call(locked)
+        self.assertEqual(self.breaker.state, 'open')
+        with self.assertRaises(retry.CircuitOpenError):
+            self.call(lambda: 'ok')
+
+    def test_trial_non_retryable_error_ends_trial(self):
+        """A non-retryable error during the trial does not wedge the breaker"""
+        self.open_breaker()
+
+        def broken():
+            raise ValueError('bad input')
+        with self.assertRaises(ValueError):
+            self.call(broken)
+        self.assertEqual(self.breaker.state, 'closed')
+        self.assertEqual(self.call(lambda: 'ok'), 'ok')
+
+    def test_interrupted_trial_is_released(self):
+        """A BaseException during the trial gives the next call a trial"""
+        self.open_breaker()
+
+        def interrupted():
+            raise KeyboardInterrupt
+        with self.assertRaises(KeyboardInterrupt):
+            self.call(interrupted)
+        self.assertEqual(self.breaker.state, 'half-open')
+        self.assertEqual(self.call(lambda: 'ok'), 'ok')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_cancelled_async_trial_is_released(self):
+        """A cancelled coroutine trial does not hold the trial forever"""
+        self.open_breaker()
+
+        @retry.retry_on_failure(retries=1, breaker=self.breaker)
+        async def slow():
+            await asyncio.sleep(10)
+
+        async def cancel_trial():
+            task = asyncio.ensure_future(slow())
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        asyncio.run(cancel_trial())
+        self.assertEqual(self.call(lambda: 'ok'), 'ok')
+
+
+class TestRetryOnFailure(unittest.TestCase):
+    """Test case class for retry classification and attempts"""
+
+    @patch('builtins.print')
+    @patch('time.sleep')
+    def test_retries_only_retryable_errors(self, mock_sleep, _):
+        """Locked errors are retried, other errors raise at once"""
+        calls = []
+
+        @retry.retry_on_failure(retries=3, delay=0.01)
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise LOCKED
+            return 'ok'
+        self.assertEqual(flaky(), 'ok')
+        self.assertEqual(mock_sleep.call_count, 2)
+
+        @retry.retry_on_failure(retries=3, delay=0.01)
+        def syntax():
+            calls.append(1)
+            raise sqlite3.OperationalError('near "x": syntax error')
+        calls.clear()
+        with self.assertRaises(sqlite3.OperationalError):
+            syntax()
+        self.assertEqual(len(calls), 1)
+
+    @patch('builtins.print')
+    @patch('time.sleep')
+    def test_no_sleep_after_last_attempt(self, mock_sleep, _):
+        """retries attempts sleep retries - 1 times"""
+        @retry.retry_on_failure(retries=3, delay=0.01)
+        def locked():
+            raise LOCKED
+        with self.assertRaises(sqlite3.OperationalError):
+            locked()
+        self.assertEqual(mock_sleep.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Unit tests for transactional and GroupCommitWriter"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+transactional = __import__('2-transactional')
+GroupCommitWriter = transactional.GroupCommitWriter
+
+
+def set_email(conn, user_id, email):
+    """Update one user's email"""
+    conn.execute('UPDATE users SET email = ? WHERE id = ?', (email, user_id))
+    return user_id
+
+
+class TestWrittenTable(unittest.TestCase):
+    """Test case class for written_table"""
+
+    def test_classification(self):
+        """Writes give their table, reads None, unparsed writes ALL_TABLES"""
+        cases = {
+            "INSERT INTO users VALUES (1, 'a')": 'users',
+            'INSERT OR REPLACE INTO "Posts" VALUES (1)': 'posts',
+            '/* note */ DELETE FROM main.users': 'users',
+            '-- why\nUPDATE [users] SET a = 1': 'users',
+            'SELECT * FROM users': None,
+            'WITH t AS (SELECT 1) SELECT * FROM t': None,
+            'BEGIN IMMEDIATE': None,
+            'SAVEPOINT group_call': None,
+            'COMMIT': None,
+            "WITH t AS (SELECT 1) UPDATE users SET a = 1":
+                transactional.ALL_TABLES,
+            'CREATE TABLE z (a)': transactional.ALL_TABLES,
+            'DROP TABLE users': transactional.ALL_TABLES,
+        }
+        for statement, expected in cases.items():
+            with self.subTest(statement=statement):
+                self.assertEqual(transactional.written_table(statement),
+                                 expected)
+
+
+class TestGroupCommitWriter(unittest.TestCase):
+    """Test case class for grouped transactional writes"""
+
+    def setUp(self):
+        """Create a users table in a temporary database"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, 'user.db')
+        conn = sqlite3.connect(self.database)
+        conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, '
+                     'email TEXT UNIQUE)')
+        conn.executemany('INSERT INTO users VALUES (?, ?)',
+                         [(i, f'user{i}') for i in range(1, 4)])
+        conn.commit()
+        conn.close()
+        self.writer = GroupCommitWriter(self.database, window=0.05)
+        self.written = []
+        transactional.commit_listeners.append(self.written.append)
+        patcher = patch('builtins.print')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Stop the writer and drop the listener"""
+        self.writer.close()
+        transactional.commit_listeners.remove(self.written.append)
+        self.tmp.cleanup()
+
+    def emails(self):
+        """Committed emails by id"""
+        conn = sqlite3.connect(self.database)
+        try:
+            return dict(conn.execute('SELECT id, email FROM users'))
+        finally:
+            conn.close()
+
+    def test_failing_call_is_isolated(self):
+        """A failing call rolls back alone; the rest commit together"""
+        first = self.writer.submit(set_email, 1, 'a@x')
+        clash = self.writer.submit(set_email, 2, 'a@x')
+        third = self.writer.submit(set_email, 3, 'c@x')
+        self.assertEqual(first.result(timeout=5), 1)
+        self.assertIsInstance(clash.exception(timeout=5),
+                              sqlite3.IntegrityError)
+        self.assertEqual(third.result(timeout=5), 3)
+        self.assertEqual(self.emails(), {1: 'a@x', 2: 'user2', 3: 'c@x'})
+        self.assertEqual(self.writer.stats['groups'], 1)
+        self.assertEqual(self.written, [{'users'}])
+
+    def test_base_exception_stays_with_caller(self):
+        """SystemExit from one call fails that call, not the writer"""
+        def bail(conn):
+            conn.execute("UPDATE users SET email = 'gone' WHERE id = 1")
+            raise SystemExit(3)
+        exiting = self.writer.submit(bail)
+        other = self.writer.submit(set_email, 2, 'b@x')
+        self.assertIsInstance(exiting.exception(timeout=5), SystemExit)
+        self.assertEqual(other.result(timeout=5), 2)
+        self.assertEqual(self.writer.submit(set_email, 3, 'c@x')
+                         .result(timeout=5), 3)
+        self.assertEqual(self.emails(), {1: 'user1', 2: 'b@x', 3: 'c@x'})
+
+    def test_decorator_group_mode(self):
+        """transactional(group=...) returns the call's result"""
+        update = transactional.transactional(group=self.writer)(set_email)
+        self.assertEqual(update(1, 'a@x'), 1)
+        self.assertEqual(self.emails()[1], 'a@x')
+
+
+class TestDeadWriter(unittest.TestCase):
+    """Test case class for a writer thread that dies"""
+
+    @patch('threading.excepthook')
+    def test_pending_calls_fail(self, _):
+        """Queued calls fail and later submits are refused"""
+        release = threading.Event()
+
+        def broken_connect(writer):
+            release.wait(5)
+            raise sqlite3.OperationalError('unable to open database file')
+        with patch.object(GroupCommitWriter, '_connect', broken_connect):
+            writer = GroupCommitWriter(':memory:')
+            pending = writer.submit(set_email, 1, 'a@x')
+            release.set()
+            self.assertIsInstance(pending.exception(timeout=5), RuntimeError)
+        writer._thread.join(5)
+        with self.assertRaises(RuntimeError):
+            writer.submit(set_email, 1, 'a@x')
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Unit tests for the sqlite3 ConnectionPool"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+with_db_connection = __import__('1-with_db_connection')
+ConnectionPool = with_db_connection.ConnectionPool
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test case class for ConnectionPool sizing"""
+
+    def setUp(self):
+        """Create a pool over a temporary database"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.tmp.name, 'user.db'),
+                                   max_size=2, timeout=5.0)
+
+    def tearDown(self):
+        """Close the pool and remove the database"""
+        self.pool.close_all()
+        self.tmp.cleanup()
+
+    def test_concurrent_acquire_is_bounded(self):
+        """Concurrent callers never open more than max_size connections"""
+        connect = self.pool._connect
+
+        def slow_connect():
+            time.sleep(0.02)
+            return connect()
+        self.pool._connect = slow_connect
+        barrier = threading.Barrier(6)
+
+        def borrow():
+            barrier.wait()
+            conn = self.pool.acquire()
+            time.sleep(0.02)
+            self.pool.release(conn)
+        threads = [threading.Thread(target=borrow) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.pool._all), 2)
+
+    def test_failed_connect_frees_slot(self):
+        """A connect error does not use up a slot"""
+        connect = self.pool._connect
+        self.pool._connect = lambda: 1 / 0
+        with self.assertRaises(ZeroDivisionError):
+            self.pool.acquire()
+        self.pool._connect = connect
+        first, second = self.pool.acquire(), self.pool.acquire()
+        self.assertIsNot(first, second)
+
+    def test_close_all_waits_for_checked_out(self):
+        """close_all closes idle connections and busy ones on release"""
+        busy, idle = self.pool.acquire(), self.pool.acquire()
+        self.pool.release(idle)
+        self.pool.close_all()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            idle.execute('SELECT 1')
+        self.assertEqual(busy.execute('SELECT 1').fetchone(), (1,))
+        self.pool.release(busy)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            busy.execute('SELECT 1')
+        self.assertEqual(self.pool._open, 0)
+
+    def test_configure_pool_during_call(self):
+        """A call in flight keeps its result when the pool is replaced"""
+        database = os.path.join(self.tmp.name, 'user.db')
+        with_db_connection.configure_pool(database=database)
+
+        @with_db_connection.with_db_connection
+        def swap_pool(conn):
+            with_db_connection.configure_pool(database=database)
+            return conn.execute('SELECT 42').fetchone()
+        self.assertEqual(swap_pool(), (42,))
+        with_db_connection.pool.close_all()
+
+
+if __name__ == '__main__':
+    unittest.main()
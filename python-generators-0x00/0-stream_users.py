@@ -1,17 +1,32 @@
 #!/usr/bin/python3
 import seed
+from sources import open_source
+from user_row import USER_SELECT, UserRow, convert_row
 
-def stream_users():
-    """Generator that yields each row from user_data table as a dictionary."""
-    connection = seed.connect_to_prodev()
-    if not connection:
+ROW_TYPES = ('dict', 'row', 'tuple')
+
+def stream_users(block_size=1000, row_type='dict', source=None):
+    """Generator that yields each row from user_data table as a dictionary.
+
+    Rows are streamed from the server ``block_size`` at a time, so memory
+    use and time-to-first-row do not grow with the table. ``row_type='row'``
+    yields compact ``UserRow`` records and ``row_type='tuple'`` plain
+    ``(user_id, name, email, age)`` tuples instead of dicts. ``source``
+    reads from another backend (see ``sources.get_source``).
+    """
+    if row_type not in ROW_TYPES:
+        raise ValueError(f"Unknown row type {row_type!r}")
+    if source is not None:
+        with open_source(source) as rows:
+            for row in rows.stream(block_size=block_size):
+                yield convert_row(row, row_type)
         return
-    
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM user_data")
-    
-    for row in cursor:
-        yield row
-    
-    cursor.close()
-    connection.close() 
\ No newline at end of file
+    with seed.pooled_connection() as connection:
+        if not connection:
+            return
+        if row_type == 'dict':
+            yield from seed.stream_query(connection, "SELECT * FROM user_data",
+                                         block_size=block_size, dictionary=True)
+            return
+        rows = seed.stream_query(connection, USER_SELECT, block_size=block_size)
+        yield from map(UserRow.from_tuple, rows) if row_type == 'row' else rows
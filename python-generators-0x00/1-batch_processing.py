@@ -1,32 +1,139 @@
 #!/usr/bin/python3
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
 import seed
+from adaptive_batch import AdaptiveBatchSizer
+from columnar import stream_columnar_batches, to_columns
+from query_plan import Query
+from sources import open_source
+from user_row import USER_COLUMNS, UserRow, convert_row
 
-def stream_users_in_batches(batch_size):
-    """Generator that yields batches of users from the database."""
-    connection = seed.connect_to_prodev()
-    if not connection:
+def stream_users_in_batches(batch_size, query=None, columnar=False,
+                            row_type='dict', source=None, adaptive=None):
+    """Generator that yields batches of users from the database.
+
+    Each batch is a single ``fetchmany(batch_size)`` on an unbuffered cursor.
+    An optional ``Query`` is compiled to SQL so filtering and projection
+    happen on the server. With ``columnar=True`` each batch is a dict of
+    NumPy column arrays instead of a list of row dicts, and with
+    ``row_type='row'`` or ``'tuple'`` a list of ``UserRow`` records or
+    ``(user_id, name, email, age)`` tuples. ``source`` reads from another
+    backend (see ``sources.get_source``).
+
+    ``adaptive=True`` (or an ``AdaptiveBatchSizer``) starts at
+    ``batch_size`` and retunes it after every fetch toward a target fetch
+    latency and byte budget. With ``adaptive=True`` the chosen sizes are
+    printed when the stream ends; pass a sizer to read them yourself.
+    """
+    if adaptive is True:
+        sizer = AdaptiveBatchSizer(initial=batch_size)
+        try:
+            yield from stream_users_in_batches(batch_size, query, columnar,
+                                               row_type, source, sizer)
+        finally:
+            print(f"Adaptive batch sizes: {sizer.report()}")
+        return
+    if row_type not in ('dict', 'row', 'tuple'):
+        raise ValueError(f"Unknown row type {row_type!r}")
+    query = query or Query()
+    if row_type != 'dict':
+        if query.columns not in ([], list(USER_COLUMNS)):
+            raise ValueError(f"row_type={row_type!r} needs all user columns")
+        query = query.copy()
+        query.columns = list(USER_COLUMNS)
+    if source is not None:
+        with open_source(source) as rows:
+            yield from _source_batches(rows, batch_size, query, columnar,
+                                       row_type, adaptive)
         return
-    
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM user_data")
-    
-    batch = []
-    for row in cursor:
-        batch.append(row)
-        if len(batch) >= batch_size:
+    sql, params = query.to_sql()
+    with seed.pooled_connection() as connection:
+        if not connection:
+            return
+        if columnar:
+            yield from stream_columnar_batches(connection, sql, params,
+                                               batch_size=batch_size,
+                                               sizer=adaptive)
+            return
+        batches = seed.stream_query_batches(connection, sql, params,
+                                            batch_size=batch_size,
+                                            dictionary=row_type == 'dict',
+                                            sizer=adaptive)
+        if row_type == 'row':
+            batches = ([UserRow.from_tuple(row) for row in batch]
+                       for batch in batches)
+        yield from batches
+
+def _source_batches(source, batch_size, query, columnar, row_type, sizer):
+    """Generator of batches from a ``sources`` backend in the requested shape."""
+    for batch in source.batches(batch_size, query, sizer):
+        if columnar:
+            names = list(batch[0])
+            yield to_columns([tuple(row.values()) for row in batch], names)
+        elif row_type == 'dict':
             yield batch
-            batch = []
-    
-    # Yield any remaining rows
-    if batch:
-        yield batch
-    
-    cursor.close()
-    connection.close()
-
-def batch_processing(batch_size):
-    """Process each batch to filter users over age 25 and print them."""
-    for batch in stream_users_in_batches(batch_size):
+        else:
+            yield [convert_row(row, row_type) for row in batch]
+
+def filter_batch(batch):
+    """Return the users in ``batch`` who are over age 25."""
+    return [user for user in batch if user['age'] > 25]
+
+def process_batches(batches, func, workers=4, executor='thread', ordered=True,
+                    max_in_flight=None):
+    """Generator that runs ``func`` on each batch in a worker pool.
+
+    The caller's thread keeps reading ``batches`` while up to
+    ``max_in_flight`` (default ``2 * workers``) batches are being
+    processed; reading pauses only when that many are pending. Results come
+    back in input order with ``ordered=True``, otherwise as they finish.
+    ``executor='process'`` needs a picklable ``func`` and batches.
+    """
+    pools = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+    if executor not in pools:
+        raise ValueError(f"Unknown executor {executor!r}")
+    max_in_flight = max_in_flight or 2 * workers
+    with pools[executor](max_workers=workers) as pool:
+        pending = deque() if ordered else set()
+        try:
+            for batch in batches:
+                if len(pending) >= max_in_flight:
+                    if ordered:
+                        yield pending.popleft().result()
+                    else:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield future.result()
+                future = pool.submit(func, batch)
+                if ordered:
+                    pending.append(future)
+                else:
+                    pending.add(future)
+            while pending:
+                if ordered:
+                    yield pending.popleft().result()
+                else:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+def batch_processing(batch_size, workers=0, executor='thread', ordered=True,
+                     max_in_flight=None, process=filter_batch):
+    """Process each batch to filter users over age 25 and print them.
+
+    The age filter is pushed down to MySQL, so only matching rows are sent.
+    With ``workers > 0`` each batch is handed to ``process`` in a thread
+    (or ``executor='process'``) pool while the next one is fetched, and
+    the users it returns are printed; see ``process_batches``.
+    """
+    batches = stream_users_in_batches(batch_size, Query().where('age', '>', 25))
+    if workers > 0:
+        batches = process_batches(batches, process, workers, executor,
+                                  ordered, max_in_flight)
+    for batch in batches:
         for user in batch:
-            if user['age'] > 25:
-                print(user) 
\ No newline at end of file
+            print(user)
@@ -1,21 +1,181 @@
 #!/usr/bin/python3
+import base64
+import json
+import queue
+import threading
 import seed
+from sources import open_source
+
+KEYSET_COLUMNS = ('user_id', 'name', 'email', 'age')
+
 
 def paginate_users(page_size, offset):
     """Fetch a specific page of users from the database."""
-    connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
-    rows = cursor.fetchall()
-    connection.close()
+    with seed.pooled_connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
+        rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
+
+def paginate_users_after(page_size, last_seen=None, key='user_id'):
+    """Fetch the page of users that follows ``last_seen`` in ``key`` order.
+
+    Seeks on the index instead of skipping ``offset`` rows, so every page
+    costs the same however deep it is. For a key other than ``user_id``,
+    ``user_id`` is added as a tie-breaker and ``last_seen`` is the
+    ``(key, user_id)`` pair of the previous page's last row.
+    """
+    if key not in KEYSET_COLUMNS:
+        raise ValueError(f"Cannot paginate on column {key!r}")
+    order = ['user_id'] if key == 'user_id' else [key, 'user_id']
+    where, params = "", ()
+    if last_seen is not None:
+        params = (last_seen,) if key == 'user_id' else tuple(last_seen)
+        placeholders = ", ".join(["%s"] * len(order))
+        where = f"WHERE ({', '.join(order)}) > ({placeholders}) "
+    with seed.pooled_connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(
+            f"SELECT * FROM user_data {where}"
+            f"ORDER BY {', '.join(order)} LIMIT %s",
+            params + (page_size,)
+        )
+        rows = cursor.fetchall()
+        cursor.close()
     return rows
 
-def lazy_paginate(page_size):
-    """Generator that yields pages of users lazily."""
+
+def encode_cursor(row, key='user_id'):
+    """Return an opaque resume token pointing just past ``row``."""
+    values = [row['user_id']] if key == 'user_id' else [row[key], row['user_id']]
+    payload = json.dumps({'k': key, 'v': values}, default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(token):
+    """Return the ``(key, last_seen)`` pair stored in a resume token."""
+    payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+    values = payload['v']
+    return payload['k'], values[0] if len(values) == 1 else tuple(values)
+
+
+def _keyset_pages(page_size, key, last_seen):
+    """Generator that yields keyset pages starting after ``last_seen``."""
+    while True:
+        page = paginate_users_after(page_size, last_seen, key)
+        if not page:
+            break
+        yield page
+        last = page[-1]
+        last_seen = last['user_id'] if key == 'user_id' else (last[key], last['user_id'])
+
+
+def _source_pages(source, page_size, last_seen):
+    """Generator that yields keyset pages from a ``sources`` backend."""
+    with open_source(source) as rows:
+        yield from rows.pages(page_size, last_seen)
+
+
+def _offset_pages(page_size):
+    """Generator that yields LIMIT/OFFSET pages."""
     offset = 0
     while True:
         page = paginate_users(page_size, offset)
         if not page:  # No more data
             break
         yield page
-        offset += page_size 
\ No newline at end of file
+        offset += page_size
+
+
+_DONE = object()
+
+
+def _read_ahead(pages, depth):
+    """Generator that fetches up to ``depth`` pages ahead on a thread.
+
+    The producer stops as soon as the consumer closes the generator (for
+    example when ``islice`` has taken what it needs); errors raised while
+    fetching are re-raised in the consumer.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+        finally:
+            pages.close()
+
+    worker = threading.Thread(target=produce, name='lazy_paginate-prefetch',
+                              daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        worker.join()
+
+
+def lazy_paginate(page_size, mode=None, cursor=None, key='user_id',
+                  prefetch=0, source=None):
+    """Generator that yields pages of users lazily.
+
+    Pages use LIMIT/OFFSET by default; ``mode='keyset'`` pages on the
+    ``key`` index instead. Pass ``cursor=encode_cursor(page[-1], key)``
+    saved from a previous run to resume after that row; offset pages
+    cannot resume and reject a cursor. With
+    ``prefetch=K`` up to K pages are fetched on a background thread while
+    the current one is processed. With ``source`` (see
+    ``sources.get_source``) pages come from that backend and resume after
+    a ``user_id``; only ``mode=None``/``'keyset'`` and ``key='user_id'``
+    are accepted there.
+    """
+    if mode not in (None, 'offset', 'keyset'):
+        raise ValueError(f"Unknown pagination mode {mode!r}")
+    if source is not None:
+        if mode == 'offset' or key != 'user_id':
+            raise ValueError(
+                "Row sources only page after a user_id; "
+                f"mode={mode!r}, key={key!r} is not supported")
+        last_seen = None
+        if cursor is not None:
+            cursor_key, last_seen = decode_cursor(cursor)
+            if cursor_key != 'user_id':
+                raise ValueError(
+                    f"Cursor was encoded for key {cursor_key!r}, "
+                    "row sources resume on 'user_id'")
+        pages = _source_pages(source, page_size, last_seen)
+    elif cursor is not None and mode != 'keyset':
+        raise ValueError("A cursor can only resume mode='keyset' pages")
+    elif mode == 'keyset':
+        last_seen = None
+        if cursor is not None:
+            key, last_seen = decode_cursor(cursor)
+        pages = _keyset_pages(page_size, key, last_seen)
+    else:
+        pages = _offset_pages(page_size)
+    if prefetch > 0:
+        pages = _read_ahead(pages, prefetch)
+    yield from pages
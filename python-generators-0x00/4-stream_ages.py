@@ -1,29 +1,47 @@
 #!/usr/bin/python3
 import seed
+from query_plan import Query
+from sources import open_source
 
-def stream_user_ages():
-    """Generator that yields user ages one by one."""
-    connection = seed.connect_to_prodev()
-    if not connection:
+def stream_user_ages(block_size=1000, source=None):
+    """Generator that yields user ages one by one, streamed in blocks.
+
+    ``source`` reads from another backend (see ``sources.get_source``).
+    """
+    if source is not None:
+        with open_source(source) as rows:
+            yield from rows.ages(block_size)
         return
-    
-    cursor = connection.cursor()
-    cursor.execute("SELECT age FROM user_data")
-    
-    for row in cursor:
-        yield row[0]  # Yield the age value
-    
-    cursor.close()
-    connection.close()
+    with seed.pooled_connection() as connection:
+        if not connection:
+            return
+        for row in seed.stream_query(connection, "SELECT age FROM user_data",
+                                     block_size=block_size):
+            yield row[0]  # Yield the age value
+
+def average_age(push_down=False, source=None):
+    """Calculate average age using the generator without loading all data into memory.
 
-def average_age():
-    """Calculate average age using the generator without loading all data into memory."""
+    With ``push_down=True`` the sum and count are computed in a single
+    aggregate query: by MySQL (the default) or SQLite, which return one
+    row, or in Python while streaming a CSV source.
+    """
     total_age = 0
     count = 0
     
-    for age in stream_user_ages():
-        total_age += age
-        count += 1
+    if push_down:
+        query = Query().aggregate(total=('sum', 'age'), count=('count', 'age'))
+        if source:
+            with open_source(source) as rows:
+                results = list(rows.stream(query))
+        else:
+            results = query.run()
+        for result in results:
+            total_age, count = result['total'] or 0, result['count']
+    else:
+        for age in stream_user_ages(source=source):
+            total_age += age
+            count += 1
     
     if count > 0:
         average = total_age / count
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""Runtime batch-size tuning for batched streams.
+
+``AdaptiveBatchSizer`` watches how long each fetch took and how wide the
+rows were, and picks the next batch size so that a batch takes about
+``target_seconds`` to fetch and stays under ``max_bytes``.
+
+Example
+-------
+>>> sizer = AdaptiveBatchSizer(initial=100, target_seconds=0.05)
+>>> sizer.observe(100, 0.01, 100 * 80)
+>>> sizer.size
+200
+"""
+import time
+
+
+def estimate_row_bytes(row):
+    """Rough in-memory payload size of one row (dict or sequence)."""
+    values = row.values() if isinstance(row, dict) else row
+    return sum(len(value) if isinstance(value, (str, bytes)) else 8
+               for value in values)
+
+
+class AdaptiveBatchSizer:
+    """Pick batch sizes toward a fetch-latency target and a byte budget.
+
+    Each observation rescales the size by ``target / observed`` time,
+    limited to halving or doubling per step so a single slow fetch cannot
+    collapse it, then caps it by ``max_bytes`` at the smoothed row width.
+    ``history`` records ``(size, rows, seconds, bytes)`` for every batch.
+    """
+
+    def __init__(self, initial=100, target_seconds=0.05, max_bytes=8 << 20,
+                 min_size=10, max_size=100000, smoothing=0.3):
+        self.size = initial
+        self.target_seconds = target_seconds
+        self.max_bytes = max_bytes
+        self.min_size = min_size
+        self.max_size = max_size
+        self.smoothing = smoothing
+        self.seconds_per_row = None
+        self.bytes_per_row = None
+        self.history = []
+
+    def _smooth(self, old, new):
+        return new if old is None else old + self.smoothing * (new - old)
+
+    def observe(self, rows, seconds, nbytes):
+        """Record a fetch of ``rows`` rows and choose the next size."""
+        self.history.append((self.size, rows, seconds, nbytes))
+        if rows == 0:
+            return
+        self.seconds_per_row = self._smooth(self.seconds_per_row, seconds / rows)
+        self.bytes_per_row = self._smooth(self.bytes_per_row, nbytes / rows)
+        if self.seconds_per_row > 0:
+            wanted = self.target_seconds / self.seconds_per_row
+        else:
+            wanted = self.size * 2
+        wanted = min(max(wanted, self.size / 2), self.size * 2)
+        if self.bytes_per_row:
+            wanted = min(wanted, self.max_bytes / self.bytes_per_row)
+        self.size = int(min(max(wanted, self.min_size), self.max_size))
+
+    def sizes(self):
+        """Return the batch sizes chosen so far."""
+        return [size for size, _, _, _ in self.history]
+
+    def report(self):
+        """Return a short summary of the tuning run."""
+        if not self.history:
+            return "no batches fetched"
+        sizes = self.sizes()
+        return (f"{len(sizes)} batches, size {sizes[0]} -> {self.size} "
+                f"(min {min(sizes)}, max {max(sizes)}), "
+                f"{(self.bytes_per_row or 0):.0f} bytes/row")
+
+
+def adaptive_batches(fetch, sizer):
+    """Generator that calls ``fetch(n)`` with sizes chosen by ``sizer``.
+
+    ``fetch`` returns a list of rows; an empty list ends the stream.
+    """
+    while True:
+        start = time.perf_counter()
+        rows = fetch(sizer.size)
+        elapsed = time.perf_counter() - start
+        if not rows:
+            return
+        sizer.observe(len(rows), elapsed,
+                      estimate_row_bytes(rows[0]) * len(rows))
+        yield rows
@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+"""Async generator counterparts of the python-generators-0x00 streams.
+
+Backed by an aiomysql connection pool: at most ``maxsize`` streams hold a
+connection at once and further consumers wait for one to be released.
+Rows are read with server-side (``SS``) cursors, so a slow consumer simply
+stops reading the socket instead of buffering the table in memory.
+
+Example
+-------
+    async for user in stream_users():
+        print(user)
+"""
+import asyncio
+import os
+import weakref
+from contextlib import asynccontextmanager
+
+try:
+    import aiomysql
+except ImportError:  # optional dependency
+    aiomysql = None
+
+DB_SETTINGS = {
+    'host': 'localhost',
+    'user': 'root',  # Change if your MySQL user is different
+    'password': '',  # Change if your MySQL password is set
+    'db': os.environ.get('ALX_PRODEV_DB', 'ALX_prodev'),
+}
+
+POOL_SETTINGS = {'minsize': 1, 'maxsize': 20, 'pool_recycle': 300}
+
+# One pool per event loop: aiomysql pools cannot be shared across loops
+_pools = weakref.WeakKeyDictionary()
+
+
+def configure_pool(**options):
+    """Change the settings used for pools created from now on."""
+    POOL_SETTINGS.update(options)
+
+
+def require_aiomysql():
+    """Raise a helpful ImportError when aiomysql is not installed."""
+    if aiomysql is None:
+        raise ImportError("async streams need aiomysql: pip install aiomysql")
+
+
+async def get_pool():
+    """Return the running loop's connection pool, creating it on first use."""
+    require_aiomysql()
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = await aiomysql.create_pool(autocommit=True, **DB_SETTINGS,
+                                          **POOL_SETTINGS)
+        _pools[loop] = pool
+    return pool
+
+
+async def close_pool():
+    """Close the running loop's pool and wait for its connections."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        pool.close()
+        await pool.wait_closed()
+
+
+@asynccontextmanager
+async def pooled_connection(timeout=None):
+    """Async context manager yielding a pooled connection.
+
+    Waits up to ``timeout`` seconds (forever if None) for a free one.
+    """
+    pool = await get_pool()
+    connection = await asyncio.wait_for(pool.acquire(), timeout)
+    try:
+        yield connection
+    finally:
+        pool.release(connection)
+
+
+async def stream_query_batches(query, params=None, batch_size=1000,
+                               dictionary=False):
+    """Async generator that streams ``query`` as lists of rows."""
+    require_aiomysql()
+    cursor_class = aiomysql.SSDictCursor if dictionary else aiomysql.SSCursor
+    async with pooled_connection() as connection:
+        finished = False
+        cursor = await connection.cursor(cursor_class)
+        try:
+            await cursor.execute(query, params)
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+            finished = True
+        finally:
+            if finished:
+                await cursor.close()
+            else:
+                # Closing the cursor would drain every unread row first;
+                # drop the connection instead and let the pool discard it.
+                connection.close()
+
+
+async def stream_query(query, params=None, block_size=1000, dictionary=False):
+    """Async generator that streams ``query`` one row at a time."""
+    batches = stream_query_batches(query, params, block_size, dictionary)
+    try:
+        async for rows in batches:
+            for row in rows:
+                yield row
+    finally:
+        await batches.aclose()
+
+
+async def stream_users(block_size=1000):
+    """Async generator that yields each user_data row as a dictionary."""
+    rows = stream_query("SELECT * FROM user_data", block_size=block_size,
+                        dictionary=True)
+    try:
+        async for row in rows:
+            yield row
+    finally:
+        await rows.aclose()
+
+
+async def stream_users_in_batches(batch_size):
+    """Async generator that yields batches of user_data rows."""
+    batches = stream_query_batches("SELECT * FROM user_data",
+                                   batch_size=batch_size, dictionary=True)
+    try:
+        async for batch in batches:
+            yield batch
+    finally:
+        await batches.aclose()
+
+
+async def paginate_users_after(page_size, last_seen=None):
+    """Fetch the page of users that follows ``last_seen`` in user_id order."""
+    where, params = "", (page_size,)
+    if last_seen is not None:
+        where, params = "WHERE user_id > %s ", (last_seen, page_size)
+    async with pooled_connection() as connection:
+        async with connection.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(
+                f"SELECT * FROM user_data {where}ORDER BY user_id LIMIT %s",
+                params)
+            return await cursor.fetchall()
+
+
+async def lazy_paginate(page_size):
+    """Async generator that yields pages of users lazily.
+
+    Pages are fetched with keyset pagination on ``user_id``, each on a
+    connection held only for that page.
+    """
+    last_seen = None
+    while True:
+        page = await paginate_users_after(page_size, last_seen)
+        if not page:
+            break
+        yield page
+        last_seen = page[-1]['user_id']
+
+
+async def stream_user_ages(block_size=1000):
+    """Async generator that yields user ages one by one."""
+    rows = stream_query("SELECT age FROM user_data", block_size=block_size)
+    try:
+        async for row in rows:
+            yield row[0]
+    finally:
+        await rows.aclose()
+
+
+async def average_age():
+    """Calculate the average age from the async age stream."""
+    total_age = 0
+    count = 0
+    async for age in stream_user_ages():
+        total_age += age
+        count += 1
+    if count > 0:
+        print(f"Average age of users: {total_age / count}")
+    else:
+        print("No users found")
+
+
+if __name__ == "__main__":
+    asyncio.run(average_age())
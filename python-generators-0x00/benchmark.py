@@ -0,0 +1,421 @@
+#!/usr/bin/python3
+"""Benchmarks for the python-generators-0x00 pipelines.
+
+Usage:
+    python3 benchmark.py suite [--rows N] [--database NAME] [--source SPEC]
+                               [--output FILE]
+    python3 benchmark.py compare OLD.json NEW.json
+    python3 benchmark.py pagination [--rows N] [--page-size N] [--pages N]
+    python3 benchmark.py columnar [--rows N] [--batch-size N]
+    python3 benchmark.py rows [--rows N]
+
+``suite`` seeds a deterministic synthetic table in a scratch database
+(``ALX_prodev_bench`` by default, or a SQLite/CSV stand-in given with
+``--source sqlite:PATH`` / ``--source csv:PATH``), runs every case in a fresh process and
+writes throughput (latency for single-row aggregates), time-to-first-row,
+peak RSS and connection counts to a JSON file tagged with the current
+commit. The LIMIT/OFFSET paging case only runs against MySQL.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+import seed
+
+lazy_paginate = __import__('2-lazy_paginate').lazy_paginate
+stream_users = __import__('0-stream_users').stream_users
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+stream_user_ages = __import__('4-stream_ages').stream_user_ages
+from query_plan import Query
+from sources import get_source
+from user_row import USER_COLUMNS, UserRow
+
+
+def count_users():
+    """Return the number of rows in user_data."""
+    with seed.pooled_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM user_data")
+        (count,) = cursor.fetchone()
+        cursor.close()
+    return count
+
+
+def write_synthetic_csv(path, rows, seed_value=42):
+    """Write ``rows`` deterministic random users to a CSV file."""
+    rng = random.Random(seed_value)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(USER_COLUMNS)
+        for i in range(rows):
+            user_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+            writer.writerow([str(user_id), f"User {i}",
+                             f"user{i}@example.com", rng.randint(1, 120)])
+
+
+def seed_synthetic(rows, chunk_size=50000, exact=False):
+    """Top user_data up to ``rows`` rows with random users.
+
+    With ``exact=True`` the table is emptied first when it holds a
+    different number of rows, so runs are comparable.
+    """
+    existing = count_users()
+    if exact and existing != rows:
+        with seed.pooled_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("TRUNCATE TABLE user_data")
+            cursor.close()
+        existing = 0
+    missing = rows - existing
+    if missing <= 0:
+        return
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        write_synthetic_csv(path, missing, seed_value=existing)
+        connection = seed.connect_to_prodev()
+        seed.bulk_insert_data(connection, path, chunk_size=chunk_size)
+        connection.close()
+    finally:
+        os.remove(path)
+
+
+def bench_pagination(page_size, max_pages=None):
+    """Walk user_data with offset and keyset pagination and time both.
+
+    Prints the total time per mode and the cost of the first and last
+    page, which shows how offset pages get slower with depth.
+    """
+    results = {}
+    for mode in ('offset', 'keyset'):
+        created = seed.get_pool().stats()['created']
+        page_times = []
+        rows = 0
+        start = time.perf_counter()
+        last = start
+        for page in lazy_paginate(page_size, mode=mode):
+            now = time.perf_counter()
+            page_times.append(now - last)
+            last = now
+            rows += len(page)
+            if max_pages and len(page_times) >= max_pages:
+                break
+        total = time.perf_counter() - start
+        results[mode] = total
+        if page_times:
+            print(f"{mode:>6}: {rows} rows in {len(page_times)} pages, "
+                  f"{total:.2f}s total, first page {page_times[0] * 1000:.1f}ms, "
+                  f"last page {page_times[-1] * 1000:.1f}ms, "
+                  f"{seed.get_pool().stats()['created'] - created} connects")
+    return results
+
+
+def bench_columnar(batch_size):
+    """Time the age > 25 filter and mean over dict rows and column arrays."""
+    start = time.perf_counter()
+    rows = matched = 0
+    total = 0
+    for batch in stream_users_in_batches(batch_size):
+        rows += len(batch)
+        for user in batch:
+            if user['age'] > 25:
+                matched += 1
+                total += user['age']
+    dict_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    col_matched = 0
+    col_total = 0.0
+    for batch in stream_users_in_batches(batch_size, columnar=True):
+        ages = batch['age']
+        older = ages[ages > 25]
+        col_matched += older.size
+        col_total += older.sum()
+    columnar_time = time.perf_counter() - start
+
+    for label, elapsed, count, summed in (('dict', dict_time, matched, total),
+                                          ('columnar', columnar_time,
+                                           col_matched, col_total)):
+        mean = summed / count if count else 0
+        print(f"{label:>8}: {rows / elapsed:.0f} rows/sec, "
+              f"{count} users over 25, mean age {mean:.2f}")
+    return {'dict': dict_time, 'columnar': columnar_time}
+
+
+def bench_row_memory(rows):
+    """Print the container memory per row for each row representation.
+
+    Field values are created once and shared, so only the cost of the
+    per-row record itself is measured.
+    """
+    values = [(str(uuid.uuid4()), f"User {i}", f"user{i}@example.com", i % 120)
+              for i in range(rows)]
+    builders = {
+        'dict': lambda row: dict(zip(USER_COLUMNS, row)),
+        'UserRow': UserRow.from_tuple,
+        'tuple': lambda row: (row[0], row[1], row[2], row[3]),
+    }
+    results = {}
+    for label, build in builders.items():
+        tracemalloc.start()
+        records = [build(row) for row in values]
+        used, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[label] = used / rows
+        del records
+        print(f"{label:>8}: {results[label]:.0f} bytes/row")
+    return results
+
+
+def _average_push_down(source):
+    query = Query().aggregate(total=('sum', 'age'), count=('count', 'age'))
+    return get_source(source).stream(query) if source else query.run()
+
+
+# Each case takes the row source spec (None for the default MySQL path)
+BENCH_CASES = {
+    'stream_users': lambda src: stream_users(source=src),
+    'stream_users(row_type=row)': lambda src: stream_users(row_type='row',
+                                                           source=src),
+    'stream_users_in_batches(1000)': lambda src: stream_users_in_batches(
+        1000, source=src),
+    'batch_processing filter': lambda src: stream_users_in_batches(
+        1000, Query().where('age', '>', 25), source=src),
+    'lazy_paginate(1000)': lambda src: lazy_paginate(1000, mode='offset',
+                                                     source=src),
+    'lazy_paginate(1000, keyset)': lambda src: lazy_paginate(
+        1000, mode='keyset', source=src),
+    'stream_user_ages': lambda src: stream_user_ages(source=src),
+    'average_age push-down': _average_push_down,
+}
+
+# LIMIT/OFFSET paging only exists on the MySQL path; row sources page by key
+MYSQL_ONLY_CASES = {'lazy_paginate(1000)'}
+
+# Cases that return one aggregate row: report latency, not rows/s
+LATENCY_CASES = {'average_age push-down'}
+
+
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # bytes on macOS
+
+
+def run_case(name, source=None):
+    """Run one benchmark case in this process and return its metrics.
+
+    Items are counted as rows, except that lists (batches, pages) count
+    their length. Connections are counted on the MySQL pool or on the row
+    source (SQLite connections, CSV file maps).
+    """
+    if source and name in MYSQL_ONLY_CASES:
+        raise ValueError(f"{name} only runs against MySQL")
+    backend = get_source(source) if source else None
+    if backend is None or backend.name == 'mysql':
+        connections = lambda: seed.get_pool().stats()['created']
+    else:
+        connections = lambda: backend.connections_opened
+    rss_before = _peak_rss_kb()
+    created = connections()
+    start = time.perf_counter()
+    first = None
+    rows = items = 0
+    for item in BENCH_CASES[name](backend):
+        if first is None:
+            first = time.perf_counter() - start
+        items += 1
+        rows += len(item) if isinstance(item, list) else 1
+    elapsed = time.perf_counter() - start
+    if backend is not None:
+        backend.close()
+    latency = name in LATENCY_CASES
+    return {
+        'rows': rows,
+        'items': items,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed > 0 and not latency else None,
+        'latency_ms': elapsed * 1000 if latency else None,
+        'time_to_first_row_ms': None if first is None else first * 1000,
+        'peak_rss_kb': _peak_rss_kb(),
+        'rss_growth_kb': _peak_rss_kb() - rss_before,
+        'connections_opened': connections() - created,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))
+                              ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_sqlite(path, rows):
+    """Create a SQLite stand-in for user_data holding exactly ``rows`` rows."""
+    fd, csv_path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        write_synthetic_csv(csv_path, rows)
+        connection = sqlite3.connect(path)
+        connection.execute("DROP TABLE IF EXISTS user_data")
+        connection.execute(
+            "CREATE TABLE user_data (user_id TEXT PRIMARY KEY, name TEXT NOT NULL, "
+            "email TEXT NOT NULL, age INTEGER NOT NULL)")
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader)
+            connection.executemany(
+                "INSERT INTO user_data VALUES (?, ?, ?, ?)", reader)
+        connection.commit()
+        connection.close()
+    finally:
+        os.remove(csv_path)
+
+
+def prepare_source(source, rows):
+    """Fill the benchmark source (MySQL when None) with ``rows`` rows."""
+    if source is None:
+        prepare_database(rows)
+        return
+    backend = get_source(source)
+    if backend.name == 'sqlite':
+        prepare_sqlite(backend.path, rows)
+    elif backend.name == 'csv':
+        write_synthetic_csv(backend.path, rows)
+    else:
+        prepare_database(rows)
+
+
+def prepare_database(rows):
+    """Create the scratch database and table and fill it with ``rows``."""
+    connection = seed.connect_db()
+    if not connection:
+        raise SystemExit("Cannot connect to MySQL")
+    seed.create_database(connection)
+    connection.close()
+    connection = seed.connect_to_prodev()
+    seed.create_table(connection)
+    connection.close()
+    seed_synthetic(rows, exact=True)
+
+
+def run_suite(rows, output, cases=None, source=None):
+    """Run every case in its own process and save the results as JSON."""
+    prepare_source(source, rows)
+    results = {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'database': seed.DATABASE,
+        'source': source or 'mysql',
+        'table_rows': rows,
+        'cases': {},
+    }
+    for name in cases or BENCH_CASES:
+        if source and name in MYSQL_ONLY_CASES:
+            print(f"{name:<30} skipped (MySQL only)")
+            continue
+        # A fresh process per case keeps peak RSS and the pool independent
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), 'case', name]
+            + (['--source', source] if source else []),
+            capture_output=True, text=True, env=dict(os.environ))
+        if completed.returncode != 0:
+            print(f"{name}: failed\n{completed.stderr}")
+            continue
+        metrics = json.loads(completed.stdout.strip().splitlines()[-1])
+        results['cases'][name] = metrics
+        if metrics['latency_ms'] is not None:
+            throughput = f"{metrics['latency_ms']:>9.1f} ms   "
+        else:
+            throughput = f"{metrics['rows_per_sec'] or 0:>12.0f} rows/s"
+        print(f"{name:<30} {throughput}  first row {metrics['time_to_first_row_ms'] or 0:>8.1f}ms  "
+              f"peak RSS {metrics['peak_rss_kb'] / 1024:>7.1f}MB  "
+              f"{metrics['connections_opened']} connects")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    return results
+
+
+def compare(old_path, new_path):
+    """Print per-case changes between two suite result files."""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    for name, metrics in new['cases'].items():
+        before = old['cases'].get(name)
+        if not before:
+            print(f"{name:<30} (new case)")
+            continue
+        parts = []
+        for key in ('rows_per_sec', 'latency_ms', 'time_to_first_row_ms',
+                    'peak_rss_kb', 'connections_opened'):
+            if before.get(key) and metrics.get(key) is not None:
+                change = (metrics[key] - before[key]) / before[key] * 100
+                parts.append(f"{key} {change:+.1f}%")
+        print(f"{name:<30} {', '.join(parts)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='benchmark', required=True)
+    suite = sub.add_parser('suite', help='run every case, save JSON')
+    suite.add_argument('--rows', type=int, default=100000)
+    suite.add_argument('--database', default='ALX_prodev_bench')
+    suite.add_argument('--output', default='benchmark-results.json')
+    suite.add_argument('--case', action='append', choices=list(BENCH_CASES))
+    suite.add_argument('--source', default=None,
+                       help="sqlite:PATH or csv:PATH instead of MySQL")
+    case = sub.add_parser('case', help='run one case (used by suite)')
+    case.add_argument('name', choices=list(BENCH_CASES))
+    case.add_argument('--source', default=None)
+    diff = sub.add_parser('compare', help='compare two suite results')
+    diff.add_argument('old')
+    diff.add_argument('new')
+    pagination = sub.add_parser('pagination', help='offset vs keyset pages')
+    pagination.add_argument('--rows', type=int, default=1000000)
+    pagination.add_argument('--page-size', type=int, default=1000)
+    pagination.add_argument('--pages', type=int, default=None)
+    columnar = sub.add_parser('columnar', help='dict rows vs NumPy columns')
+    columnar.add_argument('--rows', type=int, default=1000000)
+    columnar.add_argument('--batch-size', type=int, default=10000)
+    rows = sub.add_parser('rows', help='memory per row representation')
+    rows.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.benchmark == 'suite':
+        # Case processes inherit the variable and connect to the same database
+        os.environ['ALX_PRODEV_DB'] = seed.DATABASE = args.database
+        run_suite(args.rows, args.output, args.case, args.source)
+    elif args.benchmark == 'case':
+        print(json.dumps(run_case(args.name, args.source)))
+    elif args.benchmark == 'compare':
+        compare(args.old, args.new)
+    elif args.benchmark == 'pagination':
+        seed_synthetic(args.rows)
+        bench_pagination(args.page_size, args.pages)
+    elif args.benchmark == 'columnar':
+        seed_synthetic(args.rows)
+        bench_columnar(args.batch_size)
+    elif args.benchmark == 'rows':
+        bench_row_memory(args.rows)
+
+
+if __name__ == "__main__":
+    main()
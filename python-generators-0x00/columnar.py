@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Column-oriented batches of user_data backed by NumPy arrays.
+
+Each batch is a dict mapping column name to an array: numeric columns
+become float64 arrays and text columns become fixed-width UTF-8 byte
+arrays, so filters and aggregates can run vectorized without a dict per
+row.
+"""
+from adaptive_batch import adaptive_batches
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+NUMERIC_COLUMNS = {'age'}
+
+
+def require_numpy():
+    """Raise a helpful ImportError when NumPy is not installed."""
+    if np is None:
+        raise ImportError("columnar batches need NumPy: pip install numpy")
+
+
+def to_columns(rows, column_names):
+    """Turn a list of row tuples into a dict of column arrays."""
+    require_numpy()
+    columns = {}
+    for name, values in zip(column_names, zip(*rows)):
+        if name in NUMERIC_COLUMNS:
+            columns[name] = np.array(values, dtype=np.float64)
+        else:
+            columns[name] = np.array([v.encode('utf-8') for v in values],
+                                     dtype=np.bytes_)
+    return columns
+
+
+def stream_columnar_batches(connection, query, params=None, batch_size=1000,
+                            sizer=None):
+    """Generator that streams ``query`` as dicts of column arrays.
+
+    ``sizer`` (an ``AdaptiveBatchSizer``) overrides ``batch_size`` per fetch.
+    """
+    require_numpy()
+    cursor = connection.cursor(buffered=False)
+    cursor.execute(query, params)
+    column_names = cursor.column_names
+    if sizer is not None:
+        fetches = adaptive_batches(cursor.fetchmany, sizer)
+    else:
+        fetches = iter(lambda: cursor.fetchmany(batch_size), [])
+    for rows in fetches:
+        yield to_columns(rows, column_names)
+    cursor.close()
+
+
+def batch_len(batch):
+    """Return the number of rows in a columnar batch."""
+    return len(next(iter(batch.values()))) if batch else 0
+
+
+def row_at(batch, index):
+    """Return row ``index`` of a columnar batch as a plain dict."""
+    row = {}
+    for name, column in batch.items():
+        value = column[index]
+        row[name] = value.decode('utf-8') if isinstance(value, bytes) else value.item()
+    return row
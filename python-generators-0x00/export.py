@@ -0,0 +1,126 @@
+#!/usr/bin/python3
+"""Export user_data to Parquet, Arrow IPC or (compressed) CSV.
+
+Rows are streamed with ``stream_users_in_batches`` and written one batch
+at a time, so memory stays bounded by ``batch_size`` whatever the table
+size. The format is taken from the file extension:
+
+    python3 export.py users.parquet
+    python3 export.py users.arrow
+    python3 export.py users.csv.gz   (also .csv and .csv.zst)
+"""
+import csv
+import gzip
+import io
+import sys
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = pq = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+from user_row import USER_COLUMNS
+
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+
+
+def _tuple_batches(batch_size):
+    return stream_users_in_batches(batch_size, row_type='tuple')
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet/Arrow export needs pyarrow: pip install pyarrow")
+
+
+def _arrow_schema():
+    return pa.schema([('user_id', pa.string()), ('name', pa.string()),
+                      ('email', pa.string()), ('age', pa.int32())])
+
+
+def _record_batch(rows, schema):
+    user_ids, names, emails, ages = zip(*rows)
+    return pa.record_batch([
+        pa.array(user_ids, pa.string()),
+        pa.array(names, pa.string()),
+        pa.array(emails, pa.string()),
+        pa.array([int(age) for age in ages], pa.int32()),
+    ], schema=schema)
+
+
+def export_parquet(path, batch_size=100000, compression='zstd'):
+    """Write user_data to a Parquet file, one row group per batch."""
+    _require_pyarrow()
+    schema = _arrow_schema()
+    total = 0
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        for rows in _tuple_batches(batch_size):
+            writer.write_batch(_record_batch(rows, schema))
+            total += len(rows)
+    return total
+
+
+def export_arrow(path, batch_size=100000):
+    """Write user_data to an Arrow IPC (Feather v2) file."""
+    _require_pyarrow()
+    schema = _arrow_schema()
+    total = 0
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        for rows in _tuple_batches(batch_size):
+            writer.write_batch(_record_batch(rows, schema))
+            total += len(rows)
+    return total
+
+
+def _open_compressed(path, compression):
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', newline='', encoding='utf-8',
+                         compresslevel=6)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstd export needs zstandard: pip install zstandard")
+        raw = zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'))
+        return io.TextIOWrapper(raw, newline='', encoding='utf-8')
+    if compression is None:
+        return open(path, 'w', newline='', encoding='utf-8')
+    raise ValueError(f"Unknown compression {compression!r}")
+
+
+def export_csv(path, batch_size=100000, compression=None):
+    """Write user_data as CSV, optionally ``'gzip'`` or ``'zstd'`` compressed."""
+    total = 0
+    with _open_compressed(path, compression) as f:
+        writer = csv.writer(f)
+        writer.writerow(USER_COLUMNS)
+        for rows in _tuple_batches(batch_size):
+            writer.writerows(rows)
+            total += len(rows)
+    return total
+
+
+def export(path, batch_size=100000):
+    """Export to ``path`` in the format given by its extension."""
+    if path.endswith('.parquet'):
+        return export_parquet(path, batch_size)
+    if path.endswith(('.arrow', '.feather')):
+        return export_arrow(path, batch_size)
+    if path.endswith('.csv.gz'):
+        return export_csv(path, batch_size, 'gzip')
+    if path.endswith('.csv.zst'):
+        return export_csv(path, batch_size, 'zstd')
+    if path.endswith('.csv'):
+        return export_csv(path, batch_size)
+    raise ValueError(f"Cannot tell export format from {path!r}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    print(f"Exported {export(sys.argv[1])} rows to {sys.argv[1]}")
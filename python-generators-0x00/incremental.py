@@ -0,0 +1,158 @@
+#!/usr/bin/python3
+"""Incremental streaming of user_data rows changed since a checkpoint.
+
+``add_change_tracking`` adds an ``updated_at`` column maintained by MySQL
+on every insert and update. ``stream_changes`` then reads rows in
+``(updated_at, user_id)`` order after the last checkpoint and persists a
+new checkpoint each time the consumer asks for the next batch, i.e. once
+the previous batch has been handled, so a resumed run does not repeat
+acknowledged rows unless they changed again.
+
+``updated_at`` is the time of the UPDATE, not of its COMMIT, so a write
+that commits after a run has passed its timestamp would be skipped for
+good. Each run therefore stops below the start of the oldest transaction
+still open (read from ``information_schema.innodb_trx``, which needs the
+PROCESS privilege) and below ``settle_seconds`` ago. Without that
+privilege only writes committing within ``settle_seconds`` of their
+UPDATE are guaranteed to be seen. Deleted rows are not reported.
+"""
+import json
+import os
+import tempfile
+import threading
+
+import seed
+
+CHECKPOINT_FILE = 'user_data.checkpoints.json'
+
+
+def add_change_tracking(connection):
+    """Add the ``updated_at`` column and its index if they are missing."""
+    cursor = connection.cursor()
+    cursor.execute(
+        """
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user_data'
+          AND COLUMN_NAME = 'updated_at'
+        """
+    )
+    (exists,) = cursor.fetchone()
+    if not exists:
+        cursor.execute(
+            """
+            ALTER TABLE user_data
+              ADD COLUMN updated_at TIMESTAMP(6) NOT NULL
+                DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+              ADD INDEX idx_updated_at (updated_at, user_id)
+            """
+        )
+        connection.commit()
+        print("Change tracking added to user_data")
+    cursor.close()
+
+
+class CheckpointStore:
+    """Named high-water marks persisted atomically in a JSON file."""
+
+    def __init__(self, path=CHECKPOINT_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def load(self, name):
+        """Return the ``(updated_at, user_id)`` checkpoint or None."""
+        checkpoint = self._read().get(name)
+        return tuple(checkpoint) if checkpoint else None
+
+    def _write(self, data):
+        # Write a temp file and rename it over the old one, so a crash
+        # leaves either the previous or the new checkpoints on disk.
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def save(self, name, checkpoint):
+        """Persist ``checkpoint`` for ``name``."""
+        with self._lock:
+            data = self._read()
+            data[name] = list(checkpoint)
+            self._write(data)
+
+    def reset(self, name):
+        """Forget a checkpoint so the next run streams everything."""
+        with self._lock:
+            data = self._read()
+            if data.pop(name, None) is not None:
+                self._write(data)
+
+
+def _fetch_changes(connection, after, upper, batch_size):
+    cursor = connection.cursor(dictionary=True)
+    if after is None:
+        cursor.execute(
+            "SELECT * FROM user_data WHERE updated_at < %s "
+            "ORDER BY updated_at, user_id LIMIT %s",
+            (upper, batch_size))
+    else:
+        cursor.execute(
+            "SELECT * FROM user_data "
+            "WHERE (updated_at, user_id) > (%s, %s) AND updated_at < %s "
+            "ORDER BY updated_at, user_id LIMIT %s",
+            (after[0], after[1], upper, batch_size))
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def _upper_bound(connection, settle_seconds):
+    """Latest ``updated_at`` a run may read without outrunning a commit."""
+    cursor = connection.cursor()
+    cursor.execute("SELECT NOW(6) - INTERVAL %s SECOND", (settle_seconds,))
+    (upper,) = cursor.fetchone()
+    try:
+        # trx_started has one-second precision and is taken slightly after
+        # the first statement's NOW(), hence the extra second
+        cursor.execute(
+            "SELECT MIN(trx_started) - INTERVAL 1 SECOND "
+            "FROM information_schema.innodb_trx "
+            "WHERE trx_mysql_thread_id <> CONNECTION_ID()")
+        (oldest,) = cursor.fetchone()
+    except seed.mysql.connector.Error as err:
+        print(f"Cannot read open transactions, relying on settle_seconds: {err}")
+        oldest = None
+    cursor.close()
+    return upper if oldest is None else min(upper, oldest)
+
+
+def stream_changes(name, store=None, batch_size=1000, settle_seconds=1):
+    """Generator that yields batches of rows changed since the checkpoint.
+
+    ``name`` identifies the consumer in the checkpoint store. The run is
+    bounded below the oldest transaction still open and below
+    ``settle_seconds`` before the server time at start, so rows whose
+    writes have not committed yet are left for the next run.
+    """
+    store = store or CheckpointStore()
+    after = store.load(name)
+    with seed.pooled_connection() as connection:
+        upper = _upper_bound(connection, settle_seconds)
+    while True:
+        with seed.pooled_connection() as connection:
+            batch = _fetch_changes(connection, after, upper, batch_size)
+        if not batch:
+            break
+        yield batch
+        # The consumer came back for more, so the batch is done
+        last = batch[-1]
+        after = (last['updated_at'].isoformat(sep=' '), last['user_id'])
+        store.save(name, after)
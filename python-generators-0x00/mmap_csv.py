@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+"""Memory-mapped CSV reader for large user_data files.
+
+The file is mapped once and scanned in place: lines are located with
+``find`` on the mapped buffer, and only the fields a caller asks for are
+copied out and decoded. Lines without quotes are split directly; quoted
+lines fall back to the ``csv`` module. Records must not contain embedded
+newlines.
+
+Example
+-------
+    with MappedCSV('user_data.csv') as data:
+        for user_id, age in data.rows(['user_id', 'age']):
+            ...
+        ranges = data.split_ranges(8)    # for parallel_map workers
+"""
+import csv
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _split_line(line):
+    if b'"' in line:
+        return next(csv.reader([line.decode('utf-8')]), [])
+    return line.decode('utf-8').split(',')
+
+
+class MappedCSV:
+    """A CSV file mapped read-only into memory."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self.buffer = mmap.mmap(self._file.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            self.buffer = b''
+        self.size = len(self.buffer)
+        header_end = self._line_end(0)
+        self.header = _split_line(self.buffer[:header_end].rstrip(b'\r\n'))
+        self.header = [name.strip() for name in self.header]
+        self.data_start = min(header_end + 1, self.size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self._file.close()
+
+    def _line_end(self, pos):
+        end = self.buffer.find(b'\n', pos)
+        return self.size if end == -1 else end
+
+    def split_ranges(self, parts):
+        """Split the data lines into ``parts`` newline-aligned byte ranges.
+
+        Returns ``(start, end)`` pairs; every range begins at a line start
+        and ends just after a newline or at end of file.
+        """
+        bounds = [self.data_start]
+        span = self.size - self.data_start
+        for i in range(1, parts):
+            target = self.data_start + span * i // parts
+            if target <= bounds[-1]:
+                continue
+            # Move to the start of the line following the one ``target`` is in
+            start = self._line_end(target - 1) + 1
+            if bounds[-1] < start < self.size:
+                bounds.append(start)
+        bounds.append(self.size)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def lines(self, start=None, end=None):
+        """Generator of ``(offset_after_line, line_bytes)`` in a byte range."""
+        pos = self.data_start if start is None else start
+        end = self.size if end is None else end
+        buffer = self.buffer
+        while pos < end:
+            line_end = self._line_end(pos)
+            line = buffer[pos:line_end].rstrip(b'\r')
+            pos = line_end + 1
+            if line:
+                yield min(pos, self.size), line
+
+    def column_indexes(self, columns):
+        return [self.header.index(column) for column in columns]
+
+    def records(self, columns=None, start=None, end=None):
+        """Generator of ``(offset_after_line, fields)`` pairs.
+
+        ``fields`` is a tuple limited to ``columns`` if given, in that order.
+        """
+        indexes = self.column_indexes(columns) if columns else None
+        for offset, line in self.lines(start, end):
+            fields = _split_line(line)
+            if indexes is None:
+                yield offset, tuple(fields)
+            else:
+                yield offset, tuple(fields[i] for i in indexes)
+
+    def rows(self, columns=None, start=None, end=None):
+        """Generator of field tuples, limited to ``columns`` if given."""
+        for _, fields in self.records(columns, start, end):
+            yield fields
+
+    def column(self, name, start=None, end=None):
+        """Generator of one column's values as str."""
+        index = self.header.index(name)
+        for _, line in self.lines(start, end):
+            if b'"' in line:
+                yield _split_line(line)[index]
+                continue
+            # Copy out just this field instead of splitting the whole line
+            field_start = 0
+            for _ in range(index):
+                field_start = line.index(b',', field_start) + 1
+            field_end = line.find(b',', field_start)
+            yield line[field_start:None if field_end == -1 else field_end].decode('utf-8')
+
+
+def _map_range(path, start, end, func):
+    with MappedCSV(path) as data:
+        return func(data, start, end)
+
+
+def parallel_map(path, func, workers=4):
+    """Apply ``func(data, start, end)`` to ``workers`` ranges in processes.
+
+    ``func`` must be a picklable, module-level function; the list of its
+    per-range results is returned in file order.
+    """
+    with MappedCSV(path) as data:
+        ranges = data.split_ranges(workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_map_range, path, start, end, func)
+                   for start, end in ranges]
+        return [future.result() for future in futures]
@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+"""Parallel range-partitioned scans of user_data.
+
+The ``user_id`` key space is split into ranges, each range is read on its
+own connection in a worker process, and the per-range results are merged
+back into one iterator.
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+import seed
+from query_plan import Query, check_identifier
+
+HEX_DIGITS = '0123456789abcdef'
+
+
+def uuid_ranges(partitions):
+    """Split the UUID ``user_id`` space into ``partitions`` ordered ranges.
+
+    Returns ``(low, high)`` pairs where ``low`` is inclusive, ``high`` is
+    exclusive and None means unbounded. Random (v4) UUIDs are uniform over
+    their hex prefix, so the ranges hold roughly equal row counts.
+    """
+    span = 16 ** 4
+    bounds = [format(i * span // partitions, '04x')
+              for i in range(1, partitions)]
+    lows = [None] + bounds
+    highs = bounds + [None]
+    return list(zip(lows, highs))
+
+
+def sampled_ranges(partitions, key='user_id'):
+    """Split ``key`` into ``partitions`` ranges using the index itself.
+
+    Reads ``partitions - 1`` boundary values with index-only
+    ``ORDER BY key LIMIT 1 OFFSET n`` probes; use it when keys are not
+    uniformly distributed UUIDs.
+    """
+    check_identifier(key)
+    bounds = []
+    with seed.pooled_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM user_data")
+        (total,) = cursor.fetchone()
+        for i in range(1, partitions):
+            cursor.execute(
+                f"SELECT {key} FROM user_data ORDER BY {key} LIMIT 1 OFFSET %s",
+                (i * total // partitions,))
+            row = cursor.fetchone()
+            if row and (not bounds or row[0] != bounds[-1]):
+                bounds.append(row[0])
+        cursor.close()
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def _range_query(low, high, key, query):
+    ranged = query.copy() if query is not None else Query()
+    if low is not None:
+        ranged.where(key, '>=', low)
+    if high is not None:
+        ranged.where(key, '<', high)
+    sql, params = ranged.to_sql()
+    return sql + f" ORDER BY {key}", params
+
+
+def scan_range(low, high, key='user_id', query=None, process=None,
+               block_size=1000):
+    """Read one key range and return its rows, optionally transformed.
+
+    Runs inside a worker process on that process's own connection.
+    ``process`` is called on each row; rows for which it returns None are
+    dropped. Both ``query`` and ``process`` must be picklable.
+    """
+    sql, params = _range_query(low, high, key, query)
+    results = []
+    with seed.pooled_connection() as connection:
+        if not connection:
+            return results
+        for row in seed.stream_query(connection, sql, params,
+                                     block_size=block_size, dictionary=True):
+            if process is not None:
+                row = process(row)
+                if row is None:
+                    continue
+            results.append(row)
+    return results
+
+
+def parallel_scan(workers=4, partitions=None, ordered=True, key='user_id',
+                  query=None, process=None, ranges=None, max_in_flight=None):
+    """Generator that scans user_data across ``workers`` processes.
+
+    The table is cut into ``partitions`` key ranges (4 per worker by
+    default, so no single range holds much in memory). At most
+    ``max_in_flight`` ranges (default ``2 * workers``) are submitted or
+    waiting to be consumed; the next range is submitted as one is taken,
+    so a slow consumer does not pile finished ranges up in memory. With
+    ``ordered=True`` ranges are yielded in key order; otherwise each range
+    is yielded as soon as its worker finishes.
+    """
+    if ranges is None:
+        partitions = partitions or workers * 4
+        ranges = uuid_ranges(partitions) if key == 'user_id' else sampled_ranges(partitions, key)
+    max_in_flight = max_in_flight or 2 * workers
+    remaining = iter(ranges)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque() if ordered else set()
+
+        def submit_next():
+            for low, high in islice(remaining, 1):
+                future = executor.submit(scan_range, low, high, key, query,
+                                         process)
+                if ordered:
+                    pending.append(future)
+                else:
+                    pending.add(future)
+
+        try:
+            for _ in range(max_in_flight):
+                submit_next()
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done = wait(pending, return_when=FIRST_COMPLETED).done
+                    pending.difference_update(done)
+                for future in done:
+                    rows = future.result()
+                    submit_next()
+                    yield from rows
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+"""Declarative filters, projections and aggregates over user_data.
+
+A ``Query`` is compiled to SQL when it runs against MySQL, so only the
+matching rows or the aggregated result cross the wire. The same query can
+be evaluated in a streaming fashion over any iterable of dict rows.
+"""
+import operator
+import re
+
+import seed
+
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+OPERATORS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda value, options: value in options,
+}
+
+AGGREGATES = ('sum', 'count', 'avg', 'min', 'max')
+
+
+def check_identifier(name):
+    if not IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column name {name!r}")
+    return name
+
+
+class Query:
+    """Filter, projection and aggregation plan for one table.
+
+    Example
+    -------
+    >>> q = Query().where('age', '>', 25).select('user_id', 'age')
+    >>> q.to_sql()
+    ('SELECT user_id, age FROM user_data WHERE age > %s', [25])
+    >>> Query().aggregate(n=('count', '*')).group_by('age').to_sql()[0]
+    'SELECT age, COUNT(*) AS n FROM user_data GROUP BY age'
+    """
+
+    def __init__(self, table='user_data'):
+        self.table = check_identifier(table)
+        self.predicates = []
+        self.columns = []
+        self.aggregates = {}
+        self.groups = []
+
+    def copy(self):
+        """Return an independent copy of this query."""
+        clone = Query(self.table)
+        clone.predicates = list(self.predicates)
+        clone.columns = list(self.columns)
+        clone.aggregates = dict(self.aggregates)
+        clone.groups = list(self.groups)
+        return clone
+
+    def where(self, column, op, value):
+        """Keep only rows where ``column <op> value``."""
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator {op!r}")
+        if op == 'in':
+            value = tuple(value)
+        self.predicates.append((check_identifier(column), op, value))
+        return self
+
+    def select(self, *columns):
+        """Only return ``columns`` instead of whole rows."""
+        self.columns.extend(check_identifier(c) for c in columns)
+        return self
+
+    def aggregate(self, **named):
+        """Compute aggregates, e.g. ``aggregate(total=('sum', 'age'))``.
+
+        Column ``'*'`` is allowed for ``count``.
+        """
+        for name, (func, column) in named.items():
+            if func not in AGGREGATES:
+                raise ValueError(f"Unsupported aggregate {func!r}")
+            if not (column == '*' and func == 'count'):
+                check_identifier(column)
+            self.aggregates[check_identifier(name)] = (func, column)
+        return self
+
+    def group_by(self, *columns):
+        """Aggregate separately for each distinct value of ``columns``."""
+        self.groups.extend(check_identifier(c) for c in columns)
+        return self
+
+    def to_sql(self, placeholder='%s'):
+        """Return the ``(sql, params)`` pair for this query.
+
+        ``placeholder`` is the driver's parameter marker (``'?'`` for sqlite3).
+        """
+        params = []
+        if self.aggregates:
+            outputs = list(self.groups) + [
+                f"{func.upper()}({column}) AS {name}"
+                for name, (func, column) in self.aggregates.items()]
+        else:
+            outputs = self.columns or ['*']
+        sql = f"SELECT {', '.join(outputs)} FROM {self.table}"
+        if self.predicates:
+            clauses = []
+            for column, op, value in self.predicates:
+                if op == 'in':
+                    placeholders = ', '.join([placeholder] * len(value)) or 'NULL'
+                    clauses.append(f"{column} IN ({placeholders})")
+                    params.extend(value)
+                else:
+                    clauses.append(f"{column} {op} {placeholder}")
+                    params.append(value)
+            sql += " WHERE " + " AND ".join(clauses)
+        if self.aggregates and self.groups:
+            sql += f" GROUP BY {', '.join(self.groups)}"
+        return sql, params
+
+    def matches(self, row):
+        """Return True if ``row`` satisfies every predicate.
+
+        As in SQL, a comparison involving NULL (None) is never true.
+        """
+        for column, op, value in self.predicates:
+            current = row[column]
+            if current is None or (value is None and op != 'in'):
+                return False
+            if not OPERATORS[op](current, value):
+                return False
+        return True
+
+    def evaluate(self, rows):
+        """Generator that applies the query to an iterable of dict rows."""
+        matching = (row for row in rows if self.matches(row))
+        if self.aggregates:
+            yield from self._aggregate(matching)
+        elif self.columns:
+            for row in matching:
+                yield {column: row[column] for column in self.columns}
+        else:
+            yield from matching
+
+    def _aggregate(self, rows):
+        groups = {}
+        for row in rows:
+            key = tuple(row[column] for column in self.groups)
+            state = groups.get(key)
+            if state is None:
+                state = groups[key] = {name: [0, None]
+                                       for name in self.aggregates}
+            for name, (func, column) in self.aggregates.items():
+                value = None if column == '*' else row[column]
+                if column != '*' and value is None:
+                    continue
+                acc = state[name]  # [count, sum/min/max so far]
+                acc[0] += 1
+                if func in ('sum', 'avg'):
+                    acc[1] = value if acc[1] is None else acc[1] + value
+                elif func == 'min' and (acc[1] is None or value < acc[1]):
+                    acc[1] = value
+                elif func == 'max' and (acc[1] is None or value > acc[1]):
+                    acc[1] = value
+        if not groups and not self.groups:
+            groups[()] = {name: [0, None] for name in self.aggregates}
+        for key, state in groups.items():
+            result = dict(zip(self.groups, key))
+            for name, (func, _) in self.aggregates.items():
+                count, value = state[name]
+                if func == 'count':
+                    result[name] = count
+                elif func == 'avg':
+                    result[name] = value / count if count else None
+                else:
+                    result[name] = value
+            yield result
+
+    def run(self, rows=None, block_size=1000):
+        """Generator that yields the query's result rows as dicts.
+
+        With no ``rows`` the query is compiled to SQL and streamed from
+        MySQL; otherwise it is evaluated over ``rows``.
+        """
+        if rows is not None:
+            yield from self.evaluate(rows)
+            return
+        sql, params = self.to_sql()
+        with seed.pooled_connection() as connection:
+            if not connection:
+                return
+            yield from seed.stream_query(connection, sql, params,
+                                         block_size=block_size,
+                                         dictionary=True)
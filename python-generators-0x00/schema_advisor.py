@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""EXPLAIN the queries issued by the generators and report full scans.
+
+Usage:
+    python3 schema_advisor.py            # report on the current table
+    python3 schema_advisor.py --migrate  # migrate to the tuned layout first
+"""
+import sys
+
+import seed
+from query_plan import Query
+from user_row import USER_SELECT
+
+SAMPLE_UUID = '80000000-0000-0000-0000-000000000000'
+
+
+def generator_queries():
+    """Return ``(label, sql, params, expect_full_scan)`` for each generator."""
+    older, older_params = Query().where('age', '>', 25).to_sql()
+    ages_sum, _ = Query().aggregate(total=('sum', 'age'),
+                                    count=('count', 'age')).to_sql()
+    return [
+        ('stream_users', "SELECT * FROM user_data", (), True),
+        ('stream_users(row_type=row)', USER_SELECT, (), True),
+        ('batch_processing', older, tuple(older_params), False),
+        ('paginate_users (offset)',
+         "SELECT * FROM user_data LIMIT 100 OFFSET 100000", (), True),
+        ('paginate_users_after (keyset)',
+         "SELECT * FROM user_data WHERE (user_id) > (%s) ORDER BY user_id LIMIT 100",
+         (SAMPLE_UUID,), False),
+        ('paginate_users_after (key=age)',
+         "SELECT * FROM user_data WHERE (age, user_id) > (%s, %s) "
+         "ORDER BY age, user_id LIMIT 100", (50, SAMPLE_UUID), False),
+        ('stream_user_ages', "SELECT age FROM user_data", (), True),
+        ('average_age(push_down=True)', ages_sum, (), True),
+    ]
+
+
+def explain(connection, sql, params=()):
+    """Return the EXPLAIN rows for ``sql`` as dicts."""
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute("EXPLAIN " + sql, params)
+    plan = cursor.fetchall()
+    cursor.close()
+    return plan
+
+
+def advise(connection):
+    """Print one line per generator query and return the flagged labels.
+
+    ``type=ALL`` is a full table scan and ``type=index`` a full index
+    scan. Scans are expected for queries that read every row; for the
+    others they mean an index is missing.
+    """
+    flagged = []
+    for label, sql, params, expect_full_scan in generator_queries():
+        for step in explain(connection, sql, params):
+            access = step.get('type')
+            extra = step.get('Extra') or ''
+            full_scan = access in ('ALL', 'index')
+            if full_scan and not expect_full_scan:
+                verdict = 'FULL SCAN - add an index'
+                flagged.append(label)
+            elif 'filesort' in extra:
+                verdict = 'FILESORT - order by an indexed column'
+                flagged.append(label)
+            else:
+                verdict = 'ok' if not full_scan else 'full scan (reads every row)'
+            print(f"{label:<32} type={access:<6} key={step.get('key')} "
+                  f"rows={step.get('rows')} {extra} -> {verdict}")
+    return flagged
+
+
+if __name__ == "__main__":
+    connection = seed.connect_to_prodev()
+    if connection:
+        if '--migrate' in sys.argv[1:]:
+            seed.migrate_table(connection)
+        flagged = advise(connection)
+        connection.close()
+        sys.exit(1 if flagged else 0)
@@ -1,10 +1,30 @@
-import mysql.connector
 import csv
 import os
-from mysql.connector import errorcode
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+from adaptive_batch import adaptive_batches
+from mmap_csv import MappedCSV
+
+try:
+    import mysql.connector
+    from mysql.connector import errorcode
+except ImportError:  # only the SQLite and CSV sources are usable then
+    mysql = None
+
+# Override with ALX_PRODEV_DB, e.g. to point benchmarks at a scratch database
+DATABASE = os.environ.get('ALX_PRODEV_DB', 'ALX_prodev')
 
 def connect_db():
     """Connect to the MySQL server (not to a specific database)."""
+    if mysql is None:
+        print("Error: mysql-connector-python is not installed")
+        return None
     try:
         connection = mysql.connector.connect(
             host='localhost',
@@ -21,62 +41,556 @@ def create_database(connection):
     try:
         cursor = connection.cursor()
         cursor.execute(
-            "CREATE DATABASE IF NOT EXISTS ALX_prodev DEFAULT CHARACTER SET 'utf8mb4' COLLATE 'utf8mb4_unicode_ci';"
+            f"CREATE DATABASE IF NOT EXISTS `{DATABASE}` DEFAULT CHARACTER SET 'utf8mb4' COLLATE 'utf8mb4_unicode_ci';"
         )
         cursor.close()
     except mysql.connector.Error as err:
         print(f"Failed creating database: {err}")
 
-def connect_to_prodev():
-    """Connect to the ALX_prodev database."""
+def connect_to_prodev(**options):
+    """Connect to the ALX_prodev database.
+
+    Extra keyword options (e.g. ``allow_local_infile=True``) are passed
+    through to ``mysql.connector.connect``.
+    """
+    if mysql is None:
+        print("Error: mysql-connector-python is not installed")
+        return None
     try:
         connection = mysql.connector.connect(
             host='localhost',
             user='root',  # Change if your MySQL user is different
             password='',  # Change if your MySQL password is set
-            database='ALX_prodev'
+            database=DATABASE,
+            **options
         )
         return connection
     except mysql.connector.Error as err:
         print(f"Error: {err}")
         return None
 
-def create_table(connection):
-    """Create the user_data table if it does not exist."""
+def stream_query(connection, query, params=None, block_size=1000,
+                 dictionary=False):
+    """Generator that streams rows of ``query`` from the server.
+
+    Uses an unbuffered cursor and ``fetchmany(block_size)`` so at most one
+    block of rows is held client-side at any time, whatever the table size.
+    """
+    cursor = connection.cursor(dictionary=dictionary, buffered=False)
+    cursor.execute(query, params)
+    while True:
+        rows = cursor.fetchmany(block_size)
+        if not rows:
+            break
+        yield from rows
+    cursor.close()
+
+
+def stream_query_batches(connection, query, params=None, batch_size=1000,
+                         dictionary=False, sizer=None):
+    """Generator that streams rows of ``query`` as lists of ``batch_size``.
+
+    With an ``AdaptiveBatchSizer`` as ``sizer`` each fetch uses the size
+    it currently recommends instead.
+    """
+    cursor = connection.cursor(dictionary=dictionary, buffered=False)
+    cursor.execute(query, params)
+    if sizer is not None:
+        yield from adaptive_batches(cursor.fetchmany, sizer)
+    else:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    cursor.close()
+
+
+def close_connection(connection):
+    """Close a connection, even if a streamed result was left unread.
+
+    A consumer that stops early (e.g. ``islice``) leaves rows pending on an
+    unbuffered cursor; a normal close would first have to read them all, so
+    the socket is shut down instead.
+    """
+    if connection.unread_result:
+        connection.shutdown()
+    else:
+        connection.close()
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of ALX_prodev connections.
+
+    Idle connections are reused most-recently-used first, closed after
+    ``idle_timeout`` seconds unused, and pinged before reuse when they have
+    been idle longer than ``health_check_interval``. ``acquire`` blocks for
+    up to ``checkout_timeout`` seconds when ``max_size`` connections are
+    already checked out.
+    """
+
+    def __init__(self, max_size=8, idle_timeout=300, checkout_timeout=10,
+                 health_check_interval=30, connect=None):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self._connect = connect or connect_to_prodev
+        self._cond = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = deque()  # (connection, released_at), newest on the right
+        self._open = 0
+        self._stats = dict.fromkeys(
+            ('created', 'closed', 'checkouts', 'waits', 'timeouts',
+             'evicted', 'health_check_failures'), 0)
+
+    def _check_pid(self):
+        # Connections inherited over fork share sockets with the parent;
+        # forget them rather than closing them under the parent's feet.
+        if self._pid != os.getpid():
+            self._reset()
+
+    def _discard(self, connection):
+        self._open -= 1
+        self._stats['closed'] += 1
+        try:
+            close_connection(connection)
+        except Exception:
+            pass
+
+    def _evict_idle(self, now):
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            connection, _ = self._idle.popleft()
+            self._stats['evicted'] += 1
+            self._discard(connection)
+
+    def _healthy(self, connection, idle_for):
+        if idle_for < self.health_check_interval:
+            return True
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            self._stats['health_check_failures'] += 1
+            return False
+
+    def acquire(self, timeout=None):
+        """Check out a connection, or None if a new one cannot be opened."""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._check_pid()
+            while True:
+                now = time.monotonic()
+                self._evict_idle(now)
+                if self._idle:
+                    connection, released_at = self._idle.pop()
+                    if not self._healthy(connection, now - released_at):
+                        self._discard(connection)
+                        continue
+                    self._stats['checkouts'] += 1
+                    return connection
+                if self._open < self.max_size:
+                    self._open += 1
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"No connection free after {timeout}s "
+                        f"(max_size={self.max_size})")
+                self._stats['waits'] += 1
+                self._cond.wait(remaining)
+        # Connect outside the lock so a slow handshake does not block others
+        connection = self._connect()
+        with self._cond:
+            if connection is None:
+                self._open -= 1
+                self._cond.notify()
+                return None
+            self._stats['created'] += 1
+            self._stats['checkouts'] += 1
+        return connection
+
+    def release(self, connection):
+        """Return a checked-out connection to the pool."""
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            reusable = False
+            try:
+                reusable = not connection.unread_result and connection.is_connected()
+                if reusable:
+                    # End the read snapshot so the next user sees fresh data
+                    connection.rollback()
+            except Exception:
+                reusable = False
+            if reusable:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._discard(connection)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that checks a connection out and back in."""
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        finally:
+            if connection is not None:
+                self.release(connection)
+
+    def stats(self):
+        """Return a snapshot of pool counters for monitoring."""
+        with self._cond:
+            self._check_pid()
+            idle = len(self._idle)
+            return dict(self._stats, size=self._open, idle=idle,
+                        in_use=self._open - idle, max_size=self.max_size)
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._cond:
+            self._check_pid()
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the shared connection pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+
+def configure_pool(**options):
+    """Replace the shared pool with one built from ``options``."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(**options)
+        return _pool
+
+
+def pooled_connection(timeout=None):
+    """Context manager yielding a connection from the shared pool."""
+    return get_pool().connection(timeout)
+
+
+TUNED_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS user_data (
+        user_id CHAR(36) NOT NULL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        age SMALLINT UNSIGNED NOT NULL,
+        INDEX idx_age (age, name, email)
+    );
+"""
+
+
+def create_table(connection, tuned=False):
+    """Create the user_data table if it does not exist.
+
+    ``tuned=True`` uses a fixed-width key, an integer age and a covering
+    ``(age, name, email)`` index (InnoDB appends ``user_id``) that serves
+    the age filter and age aggregates, and drops the duplicate
+    ``INDEX(user_id)``.
+    """
+    try:
+        cursor = connection.cursor()
+        if tuned:
+            cursor.execute(TUNED_TABLE_SQL)
+        else:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS user_data (
+                    user_id VARCHAR(36) PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    email VARCHAR(255) NOT NULL,
+                    age DECIMAL NOT NULL,
+                    INDEX(user_id)
+                );
+                """
+            )
+        connection.commit()
+        print("Table user_data created successfully")
+        cursor.close()
+    except mysql.connector.Error as err:
+        print(f"Failed creating table: {err}")
+
+
+def migrate_table(connection):
+    """Migrate an existing user_data table to the tuned layout in place."""
     try:
         cursor = connection.cursor()
         cursor.execute(
             """
-            CREATE TABLE IF NOT EXISTS user_data (
-                user_id VARCHAR(36) PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                email VARCHAR(255) NOT NULL,
-                age DECIMAL NOT NULL,
-                INDEX(user_id)
-            );
+            SELECT DISTINCT INDEX_NAME FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user_data'
             """
         )
+        indexes = {name for (name,) in cursor.fetchall()}
+        changes = [
+            "MODIFY user_id CHAR(36) NOT NULL",
+            "MODIFY age SMALLINT UNSIGNED NOT NULL",
+        ]
+        if 'user_id' in indexes:  # the redundant INDEX(user_id)
+            changes.append("DROP INDEX user_id")
+        if 'idx_age' not in indexes:
+            changes.append("ADD INDEX idx_age (age, name, email)")
+        cursor.execute(f"ALTER TABLE user_data {', '.join(changes)}")
         connection.commit()
-        print("Table user_data created successfully")
+        print("Table user_data migrated successfully")
         cursor.close()
     except mysql.connector.Error as err:
-        print(f"Failed creating table: {err}")
+        print(f"Failed migrating table: {err}")
+
+CSV_COLUMNS = ('user_id', 'name', 'email', 'age')
+
 
 def insert_data(connection, csv_file):
     """Insert data from CSV into user_data table if not already present."""
     try:
         cursor = connection.cursor()
-        with open(csv_file, newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
+        with MappedCSV(csv_file) as data:
+            for row in data.rows(CSV_COLUMNS):
                 cursor.execute(
                     """
                     INSERT IGNORE INTO user_data (user_id, name, email, age)
                     VALUES (%s, %s, %s, %s)
                     """,
-                    (row['user_id'], row['name'], row['email'], row['age'])
+                    row
                 )
         connection.commit()
         cursor.close()
     except Exception as e:
-        print(f"Error inserting data: {e}") 
\ No newline at end of file
+        print(f"Error inserting data: {e}")
+
+
+BULK_INSERT_SQL = "INSERT IGNORE INTO user_data (user_id, name, email, age) VALUES "
+
+LOAD_DATA_SQL = """
+    LOAD DATA LOCAL INFILE %s
+    IGNORE INTO TABLE user_data
+    FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+    LINES TERMINATED BY '\\n'
+    (user_id, name, email, age)
+"""
+
+
+def read_csv_chunks(csv_file, chunk_size):
+    """Generator that yields lists of (user_id, name, email, age) tuples."""
+    with MappedCSV(csv_file) as data:
+        rows = data.rows(CSV_COLUMNS)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def _insert_chunk(cursor, chunk):
+    """Send one chunk as a single multi-row INSERT IGNORE statement.
+
+    The statement is built by hand because the connector only rewrites
+    plain ``INSERT INTO`` for ``executemany``; ``INSERT IGNORE`` would
+    silently fall back to one round-trip per row.
+    """
+    placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(chunk))
+    params = [value for row in chunk for value in row]
+    cursor.execute(BULK_INSERT_SQL + placeholders, params)
+
+
+def _load_chunk(cursor, chunk):
+    """Send one chunk through LOAD DATA LOCAL INFILE via a temp file.
+
+    csv.writer doubles embedded quotes but leaves backslashes alone, so
+    LOAD_DATA_SQL turns MySQL's backslash escaping off to match.
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='',
+                                     encoding='utf-8', delete=False) as tmp:
+        csv.writer(tmp, lineterminator='\n').writerows(chunk)
+    try:
+        cursor.execute(LOAD_DATA_SQL, (tmp.name,))
+    finally:
+        os.remove(tmp.name)
+
+
+def bulk_insert_data(connection, csv_file, chunk_size=10000,
+                     use_load_data=False):
+    """Bulk load user_data from CSV, committing once per chunk.
+
+    Rows are streamed from the file ``chunk_size`` at a time and sent as
+    one multi-row INSERT IGNORE or, with ``use_load_data=True``, with
+    ``LOAD DATA LOCAL INFILE``. The latter needs a connection opened with
+    ``connect_to_prodev(allow_local_infile=True)``.
+
+    Returns the number of rows sent, or None on error.
+    """
+    total = 0
+    start = time.perf_counter()
+    try:
+        cursor = connection.cursor()
+        for chunk in read_csv_chunks(csv_file, chunk_size):
+            if use_load_data:
+                _load_chunk(cursor, chunk)
+            else:
+                _insert_chunk(cursor, chunk)
+            connection.commit()
+            total += len(chunk)
+        cursor.close()
+    except Exception as e:
+        connection.rollback()
+        print(f"Error bulk inserting data after {total} rows: {e}")
+        return None
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else float(total)
+    print(f"Inserted {total} rows in {elapsed:.2f}s ({rate:.0f} rows/sec)")
+    return total
+
+
+def create_progress_table(connection):
+    """Create the seed_progress table that records committed chunks."""
+    cursor = connection.cursor()
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS seed_progress (
+            source VARCHAR(255) NOT NULL,
+            shard_start BIGINT NOT NULL,
+            byte_offset BIGINT NOT NULL,
+            rows_loaded BIGINT NOT NULL,
+            PRIMARY KEY (source, shard_start)
+        );
+        """
+    )
+    connection.commit()
+    cursor.close()
+
+
+def _source_key(csv_file):
+    # Name plus size, so a replaced or appended file is not resumed blindly
+    return f"{os.path.basename(csv_file)}:{os.path.getsize(csv_file)}"
+
+
+def split_file(csv_file, shards):
+    """Split a CSV file into ``shards`` newline-aligned byte ranges.
+
+    The header line is skipped. See ``MappedCSV.split_ranges``.
+    """
+    with MappedCSV(csv_file) as data:
+        return data.split_ranges(shards)
+
+
+def _read_range_chunks(csv_file, start, end, chunk_size):
+    """Generator of ``(offset_after_chunk, rows)`` for one byte range."""
+    with MappedCSV(csv_file) as data:
+        chunk = []
+        offset = start
+        for offset, row in data.records(CSV_COLUMNS, start, end):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield offset, chunk
+                chunk = []
+        if chunk:
+            yield offset, chunk
+
+
+def resumable_insert_data(connection, csv_file, chunk_size=10000,
+                          start=None, end=None):
+    """Load a CSV byte range, resuming after the last committed chunk.
+
+    Each chunk's rows and its ``seed_progress`` checkpoint are committed in
+    the same transaction, so after a failure the rerun continues exactly
+    after the last committed chunk. Re-sent rows are harmless thanks to
+    INSERT IGNORE. Defaults to the whole file (after its header).
+
+    Returns the number of rows loaded by this call, or None on error.
+    """
+    source = _source_key(csv_file)
+    if start is None or end is None:
+        (start, end), = split_file(csv_file, 1)
+    create_progress_table(connection)
+    cursor = connection.cursor()
+    cursor.execute(
+        "SELECT byte_offset FROM seed_progress "
+        "WHERE source = %s AND shard_start = %s",
+        (source, start))
+    saved = cursor.fetchone()
+    offset = saved[0] if saved else start
+    if offset >= end:
+        cursor.close()
+        return 0
+    total = 0
+    try:
+        for offset, chunk in _read_range_chunks(csv_file, offset, end, chunk_size):
+            _insert_chunk(cursor, chunk)
+            total += len(chunk)
+            cursor.execute(
+                """
+                INSERT INTO seed_progress (source, shard_start, byte_offset, rows_loaded)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE byte_offset = VALUES(byte_offset),
+                                        rows_loaded = rows_loaded + VALUES(rows_loaded)
+                """,
+                (source, start, offset, len(chunk)))
+            connection.commit()
+    except Exception as e:
+        connection.rollback()
+        print(f"Error loading {csv_file} from byte {start}: {e}")
+        return None
+    finally:
+        cursor.close()
+    return total
+
+
+def _load_shard(csv_file, start, end, chunk_size):
+    connection = connect_to_prodev()
+    if not connection:
+        return None
+    try:
+        return resumable_insert_data(connection, csv_file, chunk_size,
+                                     start, end)
+    finally:
+        connection.close()
+
+
+def parallel_insert_data(csv_file, shards=4, chunk_size=10000):
+    """Load a CSV file as ``shards`` byte ranges in parallel processes.
+
+    Every shard checkpoints separately, so rerunning after a failure only
+    redoes the unfinished tail of each shard. Returns the rows loaded by
+    this run, or None if any shard failed.
+    """
+    connection = connect_to_prodev()
+    if not connection:
+        return None
+    create_progress_table(connection)
+    connection.close()
+    ranges = split_file(csv_file, shards)
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        results = list(executor.map(_load_shard, [csv_file] * len(ranges),
+                                    *zip(*ranges), [chunk_size] * len(ranges)))
+    if any(result is None for result in results):
+        print("Some shards failed; rerun to resume them")
+        return None
+    total = sum(results)
+    elapsed = time.perf_counter() - start_time
+    rate = total / elapsed if elapsed > 0 else float(total)
+    print(f"Inserted {total} rows in {elapsed:.2f}s ({rate:.0f} rows/sec)")
+    return total
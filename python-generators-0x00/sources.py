@@ -0,0 +1,269 @@
+#!/usr/bin/python3
+"""Pluggable row sources for the generator pipelines.
+
+Each source streams user_data rows as dicts in the fastest way its
+backend allows:
+
+- ``MySQLSource``: pooled connection, unbuffered ``fetchmany`` and SQL
+  push-down of ``Query`` filters and aggregates.
+- ``SQLiteSource``: one read-only connection, ``fetchmany`` and the same
+  push-down (with ``?`` placeholders).
+- ``CSVSource``: the file is memory-mapped and parsed line by line;
+  queries are evaluated while streaming and pages follow file order.
+
+Use ``get_source('mysql')``, ``get_source('sqlite:users.db')`` or
+``get_source('csv:user_data.csv')`` (a bare ``.db``/``.csv`` path works
+too) and pass the result as ``source=`` to the generators. A source the
+generators build from a spec string is closed when they finish; one
+passed in stays open for the caller to close.
+"""
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from itertools import islice
+
+import seed
+from adaptive_batch import adaptive_batches
+from mmap_csv import MappedCSV
+from query_plan import Query
+
+
+class RowSource(ABC):
+    """Common interface; subclasses implement ``stream`` and ``page_after``.
+
+    ``connections_opened`` counts the connections (file maps for CSV) the
+    source has opened; MySQL connections are counted by the ``seed`` pool.
+    """
+
+    name = 'base'
+    connections_opened = 0
+
+    @abstractmethod
+    def stream(self, query=None, block_size=1000):
+        """Generator of row dicts matching ``query`` (all rows by default)."""
+
+    def batches(self, batch_size, query=None, sizer=None):
+        """Generator of lists of up to ``batch_size`` row dicts.
+
+        ``sizer`` (an ``AdaptiveBatchSizer``) overrides ``batch_size``.
+        """
+        rows = self.stream(query, block_size=batch_size)
+        fetch = lambda n: list(islice(rows, n))
+        if sizer is not None:
+            yield from adaptive_batches(fetch, sizer)
+            return
+        yield from iter(lambda: fetch(batch_size), [])
+
+    @abstractmethod
+    def page_after(self, page_size, last_seen=None):
+        """Return the ``page_size`` rows following ``last_seen`` by user_id."""
+
+    def pages(self, page_size, last_seen=None):
+        """Generator of keyset pages ordered by user_id."""
+        while True:
+            page = self.page_after(page_size, last_seen)
+            if not page:
+                return
+            yield page
+            last_seen = page[-1]['user_id']
+
+    def ages(self, block_size=1000):
+        """Generator of the age of every row."""
+        for row in self.stream(Query().select('age'), block_size):
+            yield row['age']
+
+    def close(self):
+        """Release what the source holds open between calls (nothing here)."""
+
+
+class MySQLSource(RowSource):
+    """user_data in MySQL, through the shared ``seed`` pool."""
+
+    name = 'mysql'
+
+    def stream(self, query=None, block_size=1000):
+        sql, params = (query or Query()).to_sql()
+        with seed.pooled_connection() as connection:
+            if not connection:
+                return
+            yield from seed.stream_query(connection, sql, params,
+                                         block_size=block_size,
+                                         dictionary=True)
+
+    def page_after(self, page_size, last_seen=None):
+        return __import__('2-lazy_paginate').paginate_users_after(page_size,
+                                                                  last_seen)
+
+
+class SQLiteSource(RowSource):
+    """A table in a SQLite database file."""
+
+    name = 'sqlite'
+
+    def __init__(self, path, table='user_data'):
+        self.path = path
+        self.table = table
+        self._connection = None
+
+    def connection(self):
+        if self._connection is None:
+            self.connections_opened += 1
+            self._connection = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+        return self._connection
+
+    def _query(self, query):
+        query = (query or Query()).copy()
+        query.table = self.table
+        return query
+
+    def stream(self, query=None, block_size=1000):
+        sql, params = self._query(query).to_sql(placeholder='?')
+        cursor = self.connection().execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(block_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            cursor.close()
+
+    def page_after(self, page_size, last_seen=None):
+        where, params = "", (page_size,)
+        if last_seen is not None:
+            where, params = "WHERE user_id > ? ", (last_seen, page_size)
+        cursor = self.connection().execute(
+            f"SELECT * FROM {self.table} {where}ORDER BY user_id LIMIT ?",
+            params)
+        rows = [dict(row) for row in cursor.fetchall()]
+        cursor.close()
+        return rows
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def _number(value):
+    value = value.strip()
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+class CSVSource(RowSource):
+    """A user_data CSV file, memory-mapped and parsed while streaming."""
+
+    name = 'csv'
+
+    def __init__(self, path):
+        self.path = path
+
+    def _open(self):
+        self.connections_opened += 1
+        return MappedCSV(self.path)
+
+    @staticmethod
+    def _converter(header):
+        age_index = header.index('age') if 'age' in header else None
+
+        def to_row(fields):
+            if age_index is not None:
+                fields = list(fields)
+                fields[age_index] = _number(fields[age_index])
+            return dict(zip(header, fields))
+        return to_row
+
+    def _rows(self):
+        with self._open() as data:
+            yield from map(self._converter(data.header), data.rows())
+
+    def _resume_offset(self, data, last_seen):
+        """Byte offset just past the row whose user_id is ``last_seen``."""
+        if last_seen is None:
+            return data.data_start
+        for offset, (user_id,) in data.records(['user_id']):
+            if user_id == str(last_seen):
+                return offset
+        raise ValueError(f"user_id {last_seen!r} not found in {self.path}")
+
+    @staticmethod
+    def _page(data, to_row, page_size, start):
+        """Up to ``page_size`` rows from byte ``start`` and the offset after."""
+        rows, offset = [], start
+        for offset, fields in data.records(start=start):
+            rows.append(to_row(fields))
+            if len(rows) == page_size:
+                break
+        return rows, offset
+
+    def page_after(self, page_size, last_seen=None):
+        """Return the ``page_size`` rows following ``last_seen`` in file order."""
+        with self._open() as data:
+            start = self._resume_offset(data, last_seen)
+            return self._page(data, self._converter(data.header),
+                              page_size, start)[0]
+
+    def pages(self, page_size, last_seen=None):
+        """Generator of pages in file order.
+
+        Each page continues from the byte offset where the previous one
+        stopped, so walking the file is a single pass; ``last_seen`` is
+        located once by scanning the user_id column.
+        """
+        with self._open() as data:
+            to_row = self._converter(data.header)
+            offset = self._resume_offset(data, last_seen)
+            while True:
+                page, offset = self._page(data, to_row, page_size, offset)
+                if not page:
+                    return
+                yield page
+
+    def ages(self, block_size=1000):
+        # Only the age field is copied out of the map and decoded
+        with self._open() as data:
+            for value in data.column('age'):
+                yield _number(value)
+
+    def stream(self, query=None, block_size=1000):
+        rows = self._rows()
+        yield from query.evaluate(rows) if query is not None else rows
+
+
+@contextmanager
+def open_source(spec):
+    """Context manager for ``get_source(spec)``.
+
+    Closes the source on exit when it was built here from a spec string;
+    a ``RowSource`` passed in is left open.
+    """
+    source = get_source(spec)
+    try:
+        yield source
+    finally:
+        if source is not spec:
+            source.close()
+
+
+def get_source(spec='mysql'):
+    """Build a source from ``'mysql'``, ``'sqlite:PATH'`` or ``'csv:PATH'``."""
+    if isinstance(spec, RowSource):
+        return spec
+    if spec == 'mysql':
+        return MySQLSource()
+    kind, _, path = spec.partition(':')
+    if kind == 'sqlite':
+        return SQLiteSource(path)
+    if kind == 'csv':
+        return CSVSource(path)
+    if spec.endswith(('.db', '.sqlite', '.sqlite3')):
+        return SQLiteSource(spec)
+    if spec.endswith('.csv'):
+        return CSVSource(spec)
+    raise ValueError(f"Unknown row source {spec!r}")
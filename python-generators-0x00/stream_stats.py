@@ -0,0 +1,254 @@
+#!/usr/bin/python3
+"""Single-pass, mergeable statistics over a stream of numbers.
+
+Every summary keeps bounded state and supports ``merge``, so partial
+results computed over partitions (see ``partitioned_scan``) can be
+combined into the result for the whole table.
+
+Example
+-------
+>>> stats = AgeStatistics().update_all(range(1, 101))
+>>> stats.moments.mean, stats.moments.count
+(50.5, 100)
+>>> round(stats.quantiles.quantile(0.5))
+50
+"""
+import hashlib
+import math
+import random
+
+stream_user_ages = __import__('4-stream_ages').stream_user_ages
+
+
+class Moments:
+    """Count, mean, variance, min and max (Welford's algorithm)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """Combine with another ``Moments`` (Chan et al. parallel update)."""
+        if not other.count:
+            return self
+        if not self.count:
+            self.__dict__.update(other.__dict__)
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Population variance."""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def sample_variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+
+class KLLSketch:
+    """Approximate quantiles in O(k log n) memory (KLL sketch).
+
+    Rank error is roughly ``1.7 / k`` of the stream length; the default
+    ``k=200`` gives under 1% error.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.count = 0
+        self.levels = [[]]
+        self._random = random.Random(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, value):
+        self.levels[0].append(float(value))
+        self.count += 1
+        self._compress()
+
+    def _compress(self):
+        for level in range(len(self.levels)):
+            if len(self.levels[level]) < self._capacity(level):
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            items = sorted(self.levels[level])
+            # Keep an odd leftover at this level so weights stay exact
+            self.levels[level] = [items.pop()] if len(items) % 2 else []
+            offset = self._random.randint(0, 1)
+            self.levels[level + 1].extend(items[offset::2])
+
+    def merge(self, other):
+        """Fold another sketch's items into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _weighted(self):
+        weighted = [(value, 1 << level)
+                    for level, items in enumerate(self.levels)
+                    for value in items]
+        weighted.sort()
+        return weighted
+
+    def quantile(self, q):
+        """Return the approximate ``q``-quantile (0 <= q <= 1)."""
+        weighted = self._weighted()
+        if not weighted:
+            return None
+        total = sum(weight for _, weight in weighted)
+        target = q * total
+        running = 0
+        for value, weight in weighted:
+            running += weight
+            if running >= target:
+                return value
+        return weighted[-1][0]
+
+    def quantiles(self, qs):
+        return [self.quantile(q) for q in qs]
+
+
+class HyperLogLog:
+    """Approximate distinct count in ``2 ** precision`` registers.
+
+    Standard error is about ``1.04 / sqrt(2 ** precision)``, 1.6% at the
+    default precision of 12.
+    """
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+
+    def update(self, value):
+        # Hash the float so 67, 67.0 and Decimal('67') (MySQL's AVG/SUM
+        # type) count as one value, like the other summaries see them
+        key = float(value).hex().encode()
+        digest = hashlib.blake2b(key, digest_size=8).digest()
+        h = int.from_bytes(digest, 'big')
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting
+        return round(estimate)
+
+
+class Histogram:
+    """Counts per fixed-width bucket starting at ``start``."""
+
+    def __init__(self, width=10, start=0):
+        self.width = width
+        self.start = start
+        self.buckets = {}
+
+    def update(self, value):
+        bucket = int((float(value) - self.start) // self.width)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def merge(self, other):
+        if (other.width, other.start) != (self.width, self.start):
+            raise ValueError("Cannot merge histograms with different buckets")
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        return self
+
+    def items(self):
+        """Yield ``(low, high, count)`` for each non-empty bucket in order."""
+        for bucket in sorted(self.buckets):
+            low = self.start + bucket * self.width
+            yield low, low + self.width, self.buckets[bucket]
+
+
+class AgeStatistics:
+    """All of the above, fed from a single pass over the ages."""
+
+    def __init__(self, k=200, precision=12, bucket_width=10):
+        self.moments = Moments()
+        self.quantiles = KLLSketch(k)
+        self.distinct = HyperLogLog(precision)
+        self.histogram = Histogram(bucket_width)
+
+    def update(self, value):
+        self.moments.update(value)
+        self.quantiles.update(value)
+        self.distinct.update(value)
+        self.histogram.update(value)
+
+    def update_all(self, values):
+        for value in values:
+            self.update(value)
+        return self
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        self.distinct.merge(other.distinct)
+        self.histogram.merge(other.histogram)
+        return self
+
+    def summary(self, percentiles=(0.25, 0.5, 0.75, 0.9, 0.99)):
+        """Return the statistics as a plain dict for dashboards."""
+        return {
+            'count': self.moments.count,
+            'mean': self.moments.mean,
+            'variance': self.moments.variance,
+            'stddev': self.moments.stddev,
+            'min': self.moments.min,
+            'max': self.moments.max,
+            'median': self.quantiles.quantile(0.5),
+            'percentiles': dict(zip(percentiles,
+                                    self.quantiles.quantiles(percentiles))),
+            'distinct': self.distinct.count(),
+            'histogram': list(self.histogram.items()),
+        }
+
+
+def age_statistics(ages=None, **options):
+    """Compute ``AgeStatistics`` over ``ages`` (default: stream_user_ages())."""
+    stats = AgeStatistics(**options)
+    return stats.update_all(stream_user_ages() if ages is None else ages)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Unit tests for AdaptiveBatchSizer and adaptive_batches"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from adaptive_batch import (AdaptiveBatchSizer, adaptive_batches,
+                            estimate_row_bytes)
+
+batch_processing = __import__('1-batch_processing')
+
+
+class TestAdaptiveBatchSizer(unittest.TestCase):
+    """Test case class for AdaptiveBatchSizer"""
+
+    def feed(self, sizer, seconds_per_row, bytes_per_row, batches):
+        """Observe batches of the current size at a fixed cost per row"""
+        for _ in range(batches):
+            rows = sizer.size
+            sizer.observe(rows, rows * seconds_per_row, rows * bytes_per_row)
+
+    def test_converges_to_latency_target(self):
+        """A steady cost per row settles at target / cost"""
+        sizer = AdaptiveBatchSizer(initial=10, target_seconds=0.05,
+                                   max_size=10 ** 6)
+        self.feed(sizer, 1e-5, 10, 20)
+        self.assertEqual(sizer.size, 5000)
+
+    def test_step_is_at_most_double_or_half(self):
+        """One observation can only double or halve the size"""
+        sizer = AdaptiveBatchSizer(initial=100, target_seconds=1.0)
+        sizer.observe(100, 1e-6, 100)
+        self.assertEqual(sizer.size, 200)
+        sizer = AdaptiveBatchSizer(initial=100, target_seconds=0.001)
+        sizer.observe(100, 10.0, 100)
+        self.assertEqual(sizer.size, 50)
+
+    def test_byte_budget_caps_size(self):
+        """Wide rows are capped by max_bytes"""
+        sizer = AdaptiveBatchSizer(initial=100, target_seconds=10,
+                                   max_bytes=1000)
+        self.feed(sizer, 1e-6, 100, 5)
+        self.assertEqual(sizer.size, 10)
+
+    def test_min_and_max_size(self):
+        """The size stays within min_size and max_size"""
+        sizer = AdaptiveBatchSizer(initial=20, target_seconds=1e-9,
+                                   min_size=15)
+        self.feed(sizer, 1.0, 1, 5)
+        self.assertEqual(sizer.size, 15)
+        sizer = AdaptiveBatchSizer(initial=20, target_seconds=100,
+                                   max_size=64)
+        self.feed(sizer, 1e-6, 1, 10)
+        self.assertEqual(sizer.size, 64)
+
+    def test_empty_batch_is_recorded_only(self):
+        """An empty fetch leaves the size alone"""
+        sizer = AdaptiveBatchSizer(initial=100)
+        sizer.observe(0, 0.5, 0)
+        self.assertEqual(sizer.size, 100)
+        self.assertEqual(sizer.sizes(), [100])
+
+
+class TestAdaptiveBatches(unittest.TestCase):
+    """Test case class for adaptive_batches"""
+
+    def test_every_row_once_in_order(self):
+        """Batches cover the input exactly once and follow the sizer"""
+        data = [(n, f'user{n}') for n in range(10000)]
+        position = 0
+
+        def fetch(n):
+            nonlocal position
+            rows = data[position:position + n]
+            position += n
+            return rows
+        sizer = AdaptiveBatchSizer(initial=10, min_size=10)
+        batches = list(adaptive_batches(fetch, sizer))
+        self.assertEqual([row for batch in batches for row in batch], data)
+        self.assertEqual([len(batch) for batch in batches[:-1]],
+                         sizer.sizes()[:len(batches) - 1])
+
+    def test_estimate_row_bytes(self):
+        """Strings count their length, other values eight bytes"""
+        self.assertEqual(estimate_row_bytes({'a': 'abc', 'b': 1}), 11)
+        self.assertEqual(estimate_row_bytes(('ab', b'cd', 3.0)), 12)
+
+
+class TestAdaptiveStream(unittest.TestCase):
+    """Test case class for stream_users_in_batches(adaptive=...)"""
+
+    def setUp(self):
+        """Write a small user_data CSV file"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, 'users.csv')
+        with open(self.source, 'w') as f:
+            f.write('user_id,name,email,age\n')
+            for n in range(500):
+                f.write(f'u{n},User {n},u{n}@x.com,{n % 90}\n')
+
+    def tearDown(self):
+        """Remove the CSV file"""
+        self.tmp.cleanup()
+
+    @patch('builtins.print')
+    def test_adaptive_true_reports_sizes(self, mock_print):
+        """The sizes chosen are printed when the stream ends"""
+        batches = batch_processing.stream_users_in_batches(
+            10, source=f'csv:{self.source}', adaptive=True)
+        self.assertEqual(sum(len(batch) for batch in batches), 500)
+        mock_print.assert_called_once()
+        self.assertIn('size 10 ->', mock_print.call_args[0][0])
+
+    def test_caller_sizer_records_sizes(self):
+        """A sizer passed in holds the size of every batch"""
+        sizer = AdaptiveBatchSizer(initial=10, min_size=10)
+        batches = list(batch_processing.stream_users_in_batches(
+            10, source=f'csv:{self.source}', adaptive=sizer))
+        self.assertEqual([len(batch) for batch in batches[:-1]],
+                         sizer.sizes()[:len(batches) - 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
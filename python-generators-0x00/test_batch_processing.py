@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Unit tests for process_batches"""
+
+import time
+import unittest
+
+batch_processing = __import__('1-batch_processing')
+process_batches = batch_processing.process_batches
+
+BATCHES = [[{'age': age} for age in range(start, start + 10)]
+           for start in range(0, 60, 10)]
+
+
+def slow_first(batch):
+    """Take longer on the first batch so it finishes last"""
+    if batch[0]['age'] == 0:
+        time.sleep(0.3)
+    return batch[0]['age']
+
+
+class TestProcessBatches(unittest.TestCase):
+    """Test case class for process_batches"""
+
+    def test_ordered_keeps_input_order(self):
+        """ordered=True yields results in input order"""
+        results = list(process_batches(iter(BATCHES), slow_first, workers=3))
+        self.assertEqual(results, [0, 10, 20, 30, 40, 50])
+
+    def test_unordered_yields_as_finished(self):
+        """ordered=False yields each result as soon as it is done"""
+        results = list(process_batches(iter(BATCHES), slow_first, workers=3,
+                                       ordered=False))
+        self.assertEqual(sorted(results), [0, 10, 20, 30, 40, 50])
+        self.assertNotEqual(results[0], 0)
+
+    def test_max_in_flight_bounds_reading_ahead(self):
+        """At most max_in_flight batches are pending beyond the consumer"""
+        for ordered in (True, False):
+            with self.subTest(ordered=ordered):
+                read = []
+
+                def source():
+                    for batch in BATCHES:
+                        read.append(batch)
+                        yield batch
+                consumed = 0
+                for _ in process_batches(source(), len, workers=2,
+                                         ordered=ordered, max_in_flight=2):
+                    consumed += 1
+                    self.assertLessEqual(len(read) - consumed, 2)
+                self.assertEqual(consumed, len(BATCHES))
+
+    def test_process_executor(self):
+        """executor='process' runs a picklable func in worker processes"""
+        results = process_batches(iter(BATCHES), batch_processing.filter_batch,
+                                  workers=2, executor='process')
+        self.assertEqual([user['age'] for batch in results for user in batch],
+                         list(range(26, 60)))
+
+    def test_unknown_executor(self):
+        """Only thread and process pools are accepted"""
+        with self.assertRaises(ValueError):
+            next(process_batches(iter(BATCHES), len, executor='fiber'))
+
+    def test_stops_early(self):
+        """Closing the generator cancels the pending batches"""
+        read = []
+
+        def source():
+            for batch in BATCHES * 100:
+                read.append(batch)
+                yield batch
+        results = process_batches(source(), len, workers=2, max_in_flight=2)
+        next(results)
+        results.close()
+        self.assertLess(len(read), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
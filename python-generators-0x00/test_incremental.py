@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Unit tests for CheckpointStore and the stream_changes checkpoint handoff"""
+
+import contextlib
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import incremental
+from incremental import CheckpointStore
+
+START = datetime.datetime(2024, 1, 1, 12, 0, 0)
+ROWS = [{'user_id': f'u{n}', 'updated_at': START + datetime.timedelta(
+    seconds=n // 2)} for n in range(7)]
+
+
+def fake_fetch(connection, after, upper, batch_size):
+    """Serve ROWS after the checkpoint, as the SQL query would"""
+    def key(row):
+        return row['updated_at'].isoformat(sep=' '), row['user_id']
+    return [row for row in ROWS
+            if after is None or key(row) > tuple(after)][:batch_size]
+
+
+@contextlib.contextmanager
+def no_connection(timeout=None):
+    """Stand-in for seed.pooled_connection"""
+    yield None
+
+
+class CheckpointTestCase(unittest.TestCase):
+    """Gives each test its own checkpoint file"""
+
+    def setUp(self):
+        """Point a store at a temporary file"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'checkpoints.json')
+        self.store = CheckpointStore(self.path)
+
+    def tearDown(self):
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+
+class TestCheckpointStore(CheckpointTestCase):
+    """Test case class for CheckpointStore"""
+
+    def test_save_load_reset(self):
+        """Checkpoints are kept per name and survive a new store"""
+        self.assertIsNone(self.store.load('a'))
+        self.store.save('a', ('2024-01-01 12:00:00', 'u1'))
+        self.store.save('b', ('2024-01-02 00:00:00', 'u9'))
+        reopened = CheckpointStore(self.path)
+        self.assertEqual(reopened.load('a'), ('2024-01-01 12:00:00', 'u1'))
+        reopened.reset('a')
+        self.assertIsNone(self.store.load('a'))
+        self.assertEqual(self.store.load('b'), ('2024-01-02 00:00:00', 'u9'))
+
+    def test_no_temp_files_left(self):
+        """The atomic rename leaves only the checkpoint file"""
+        for n in range(3):
+            self.store.save('a', ('t', f'u{n}'))
+        self.assertEqual(os.listdir(self.tmp.name), ['checkpoints.json'])
+
+
+@patch('incremental._upper_bound', lambda connection, settle: None)
+@patch('incremental._fetch_changes', fake_fetch)
+@patch('seed.pooled_connection', no_connection)
+class TestStreamChanges(CheckpointTestCase):
+    """Test case class for the batch/checkpoint handoff"""
+
+    def ids(self, batches):
+        """user_ids of every row in batches"""
+        return [row['user_id'] for batch in batches for row in batch]
+
+    def test_checkpoint_follows_consumer(self):
+        """A batch is checkpointed only when the next one is requested"""
+        stream = incremental.stream_changes('c', self.store, batch_size=3)
+        next(stream)
+        self.assertIsNone(self.store.load('c'))
+        next(stream)
+        self.assertEqual(self.store.load('c')[1], 'u2')
+        stream.close()
+        # the second batch was never acknowledged, so it comes back
+        rest = incremental.stream_changes('c', self.store, batch_size=3)
+        self.assertEqual(self.ids(rest), ['u3', 'u4', 'u5', 'u6'])
+        self.assertEqual(self.store.load('c')[1], 'u6')
+
+    def test_resume_neither_repeats_nor_skips(self):
+        """Runs stopped after each acknowledged batch see every row once"""
+        seen = []
+        while True:
+            stream = incremental.stream_changes('d', self.store, batch_size=2)
+            batch = next(stream, None)
+            if batch is None:
+                break
+            seen.extend(row['user_id'] for row in batch)
+            # asking for more acknowledges the batch; then stop this run
+            next(stream, None)
+            stream.close()
+        self.assertEqual(seen, [row['user_id'] for row in ROWS])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Unit tests for lazy_paginate prefetching and options"""
+
+import threading
+import time
+import unittest
+from itertools import count, islice
+
+lazy_paginate = __import__('2-lazy_paginate')
+_read_ahead = lazy_paginate._read_ahead
+
+
+class Pages:
+    """Endless page generator that counts what it produced"""
+
+    def __init__(self, fail_after=None):
+        self.produced = 0
+        self.closed = threading.Event()
+        self.fail_after = fail_after
+
+    def __iter__(self):
+        try:
+            for n in count():
+                if n == self.fail_after:
+                    raise RuntimeError('fetch failed')
+                self.produced += 1
+                yield [n]
+        finally:
+            self.closed.set()
+
+
+class TestReadAhead(unittest.TestCase):
+    """Test case class for the _read_ahead prefetch thread"""
+
+    def test_early_stop_closes_producer(self):
+        """Closing after islice stops the producer and closes its pages"""
+        source = Pages()
+        pages = _read_ahead(iter(source), 2)
+        self.assertEqual(list(islice(pages, 3)), [[0], [1], [2]])
+        pages.close()
+        self.assertTrue(source.closed.is_set())
+        produced = source.produced
+        time.sleep(0.2)
+        self.assertEqual(source.produced, produced)
+
+    def test_queue_stays_bounded(self):
+        """The producer runs at most depth pages (plus one in hand) ahead"""
+        source = Pages()
+        pages = _read_ahead(iter(source), 3)
+        next(pages)
+        time.sleep(0.3)
+        self.assertLessEqual(source.produced, 1 + 3 + 1)
+        pages.close()
+
+    def test_producer_error_reraised(self):
+        """An error raised while fetching reaches the consumer"""
+        pages = _read_ahead(iter(Pages(fail_after=2)), 2)
+        self.assertEqual(next(pages), [0])
+        self.assertEqual(next(pages), [1])
+        with self.assertRaises(RuntimeError):
+            next(pages)
+
+
+class TestLazyPaginateOptions(unittest.TestCase):
+    """Test case class for lazy_paginate option checks"""
+
+    def test_cursor_needs_keyset_mode(self):
+        """A cursor without mode='keyset' is rejected, not ignored"""
+        token = lazy_paginate.encode_cursor({'user_id': 'id-1'})
+        for mode in (None, 'offset'):
+            with self.subTest(mode=mode):
+                with self.assertRaises(ValueError):
+                    next(lazy_paginate.lazy_paginate(2, mode=mode,
+                                                     cursor=token))
+
+
+if __name__ == '__main__':
+    unittest.main()
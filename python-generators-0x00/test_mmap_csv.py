@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Unit tests for MappedCSV"""
+
+import csv
+import os
+import tempfile
+import unittest
+
+from mmap_csv import MappedCSV
+
+HEADER = 'user_id,name,email,age'
+
+
+def make_lines(count):
+    """Data lines of varying width, some with quoted commas"""
+    return [f'id{n},"Name, {n}",u{n}@x.com,{n % 90}' if n % 7 == 0
+            else f'id{n},Name {"x" * (n % 13)},u{n}@x.com,{n % 90}'
+            for n in range(count)]
+
+
+class TestMappedCSV(unittest.TestCase):
+    """Test case class for MappedCSV"""
+
+    def setUp(self):
+        """Create a temporary directory for the files"""
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary files"""
+        self.tmp.cleanup()
+
+    def write(self, text, name='data.csv'):
+        """Write text as bytes and return the path"""
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(text.encode('utf-8'))
+        return path
+
+    def test_split_ranges_cover_every_line_once(self):
+        """Ranges are contiguous and read every line exactly once"""
+        for count, ending, trailing in ((0, '\n', True), (1, '\n', True),
+                                        (5, '\n', False), (97, '\n', True),
+                                        (97, '\r\n', False)):
+            lines = make_lines(count)
+            text = ending.join([HEADER] + lines) + (ending if trailing else '')
+            path = self.write(text)
+            with MappedCSV(path) as data:
+                for parts in (1, 2, 3, 8, 50, 200):
+                    with self.subTest(count=count, ending=ending,
+                                      trailing=trailing, parts=parts):
+                        ranges = data.split_ranges(parts)
+                        self.assertEqual(ranges[0][0], data.data_start)
+                        self.assertEqual(ranges[-1][1], data.size)
+                        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                            self.assertEqual(end, start)
+                        read = [line.decode() for start, end in ranges
+                                for _, line in data.lines(start, end)]
+                        self.assertEqual(read, lines)
+                        self.assertLessEqual(len(ranges), max(parts, 1))
+
+    def test_rows_match_csv_module(self):
+        """rows() and column() agree with csv.reader"""
+        path = self.write('\n'.join([HEADER] + make_lines(50)) + '\n')
+        with open(path, newline='') as f:
+            expected = list(csv.reader(f))[1:]
+        with MappedCSV(path) as data:
+            self.assertEqual(data.header, HEADER.split(','))
+            self.assertEqual([list(row) for row in data.rows()], expected)
+            self.assertEqual(list(data.rows(['age', 'user_id'])),
+                             [(row[3], row[0]) for row in expected])
+            self.assertEqual(list(data.column('name')),
+                             [row[1] for row in expected])
+
+    def test_record_offsets_resume(self):
+        """records() offsets resume just after their line"""
+        path = self.write('\n'.join([HEADER] + make_lines(10)) + '\n')
+        with MappedCSV(path) as data:
+            records = list(data.records(['user_id']))
+            offset = records[3][0]
+            rest = [fields for _, fields in data.records(['user_id'],
+                                                         start=offset)]
+            self.assertEqual(rest, [fields for _, fields in records[4:]])
+
+    def test_empty_file(self):
+        """An empty file has no header and no lines"""
+        path = self.write('')
+        with MappedCSV(path) as data:
+            self.assertEqual(list(data.lines()), [])
+            self.assertEqual(list(data.rows()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
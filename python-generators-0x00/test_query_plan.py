@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Unit tests for Query: streaming evaluation against SQL results"""
+
+import sqlite3
+import unittest
+
+from query_plan import Query
+
+ROWS = [
+    {'user_id': 'a', 'name': 'Ada', 'email': 'a@x', 'age': 30},
+    {'user_id': 'b', 'name': 'Bob', 'email': 'b@x', 'age': None},
+    {'user_id': 'c', 'name': 'Cy', 'email': None, 'age': 19},
+    {'user_id': 'd', 'name': 'Di', 'email': 'd@x', 'age': 30},
+    {'user_id': 'e', 'name': 'Ed', 'email': 'e@x', 'age': 42},
+]
+
+
+def rows_key(row):
+    """Sort rows with NULLs first, whatever the column types"""
+    return [(value is not None, str(value)) for value in row.values()]
+
+
+class TestEvaluateMatchesSQL(unittest.TestCase):
+    """Test case class comparing Query.evaluate with SQLite"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load ROWS into an in-memory SQLite user_data table"""
+        cls.conn = sqlite3.connect(':memory:')
+        cls.conn.row_factory = sqlite3.Row
+        cls.conn.execute('CREATE TABLE user_data '
+                         '(user_id TEXT, name TEXT, email TEXT, age INTEGER)')
+        cls.conn.executemany(
+            'INSERT INTO user_data VALUES (:user_id, :name, :email, :age)',
+            ROWS)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the connection"""
+        cls.conn.close()
+
+    def assertSameResult(self, query, rows=ROWS):
+        """evaluate() over rows returns what SQLite returns"""
+        sql, params = query.to_sql(placeholder='?')
+        expected = [dict(row) for row in self.conn.execute(sql, params)]
+        actual = list(query.evaluate(rows))
+        self.assertEqual(sorted(actual, key=rows_key),
+                         sorted(expected, key=rows_key), sql)
+
+    def test_predicates(self):
+        """Filters agree with SQL, including NULL operands"""
+        for op, value in (('=', 30), ('!=', 30), ('<', 30), ('<=', 30),
+                          ('>', 25), ('>=', 42), ('in', (19, 42)),
+                          ('in', (19, None)), ('=', None), ('!=', None)):
+            with self.subTest(op=op, value=value):
+                self.assertSameResult(Query().where('age', op, value))
+        self.assertSameResult(Query().where('email', '!=', 'a@x'))
+
+    def test_projection(self):
+        """select() keeps only the named columns"""
+        self.assertSameResult(
+            Query().where('age', '>', 20).select('user_id', 'age'))
+
+    def test_each_aggregate(self):
+        """Every aggregate skips NULLs the way SQL does"""
+        for func in ('sum', 'count', 'avg', 'min', 'max'):
+            with self.subTest(func=func):
+                self.assertSameResult(Query().aggregate(v=(func, 'age')))
+                self.assertSameResult(
+                    Query().aggregate(v=(func, 'age')).group_by('email'))
+        self.assertSameResult(Query().aggregate(n=('count', '*')))
+
+    def test_aggregates_over_no_rows(self):
+        """Empty input gives COUNT 0 and NULL for the others"""
+        query = Query().where('age', '>', 100).aggregate(
+            n=('count', '*'), c=('count', 'age'), s=('sum', 'age'),
+            a=('avg', 'age'), lo=('min', 'age'), hi=('max', 'age'))
+        self.assertSameResult(query)
+        self.assertSameResult(
+            Query().where('age', '>', 100).aggregate(
+                n=('count', '*')).group_by('age'))
+
+    def test_group_by_null_group(self):
+        """NULL values form their own group"""
+        self.assertSameResult(
+            Query().aggregate(n=('count', '*'), s=('sum', 'age'))
+            .group_by('age'))
+
+
+class TestQueryValidation(unittest.TestCase):
+    """Test case class for rejected query parts"""
+
+    def test_invalid_parts(self):
+        """Bad identifiers, operators and aggregates raise ValueError"""
+        for build in (lambda: Query('users; DROP'),
+                      lambda: Query().where('age', 'LIKE', 1),
+                      lambda: Query().select('age)'),
+                      lambda: Query().aggregate(v=('median', 'age')),
+                      lambda: Query().aggregate(v=('sum', '*'))):
+            with self.assertRaises(ValueError):
+                build()
+
+
+if __name__ == '__main__':
+    unittest.main()
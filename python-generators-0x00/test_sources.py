@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Unit tests for the SQLite and CSV row sources"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sources import CSVSource, RowSource, SQLiteSource
+
+stream_users = __import__('0-stream_users').stream_users
+lazy_paginate = __import__('2-lazy_paginate')
+stream_user_ages = __import__('4-stream_ages').stream_user_ages
+
+USERS = [(f'id-{n:02d}', f'User {n}', f'user{n}@example.com', 20 + n)
+         for n in (7, 3, 11, 1, 9, 5, 2)]
+
+
+class SourceTestCase(unittest.TestCase):
+    """Writes USERS to a CSV file and a SQLite database"""
+
+    def setUp(self):
+        """Create both backing files in a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, 'users.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write('user_id,name,email,age\n')
+            for row in USERS:
+                f.write(','.join(map(str, row)) + '\n')
+        self.db_path = os.path.join(self.tmp.name, 'users.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE user_data '
+                     '(user_id TEXT, name TEXT, email TEXT, age INTEGER)')
+        conn.executemany('INSERT INTO user_data VALUES (?, ?, ?, ?)', USERS)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Remove the temporary files"""
+        self.tmp.cleanup()
+
+
+class TestCSVPages(SourceTestCase):
+    """Test case class for CSVSource paging"""
+
+    def test_pages_cover_file_in_order(self):
+        """Pages walk the file once, in file order"""
+        pages = list(CSVSource(self.csv_path).pages(3))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([row['user_id'] for page in pages for row in page],
+                         [row[0] for row in USERS])
+        self.assertEqual(pages[0][0]['age'], 27)
+
+    def test_resume_after_user_id(self):
+        """last_seen resumes just after that row"""
+        source = CSVSource(self.csv_path)
+        rest = list(source.pages(2, last_seen='id-11'))
+        self.assertEqual([row['user_id'] for page in rest for row in page],
+                         ['id-01', 'id-09', 'id-05', 'id-02'])
+        self.assertEqual(source.page_after(1, 'id-05')[0]['user_id'], 'id-02')
+        self.assertEqual(source.page_after(2, 'id-02'), [])
+
+    def test_unknown_last_seen(self):
+        """An unknown user_id raises ValueError"""
+        with self.assertRaises(ValueError):
+            list(CSVSource(self.csv_path).pages(2, last_seen='missing'))
+
+
+class TestSQLitePages(SourceTestCase):
+    """Test case class for SQLiteSource paging"""
+
+    def test_pages_in_user_id_order(self):
+        """Pages follow user_id order"""
+        source = SQLiteSource(self.db_path)
+        ids = [row['user_id'] for page in source.pages(3) for row in page]
+        source.close()
+        self.assertEqual(ids, sorted(row[0] for row in USERS))
+
+
+class TestLazyPaginateSource(SourceTestCase):
+    """Test case class for lazy_paginate with a row source"""
+
+    def test_cursor_resumes(self):
+        """A user_id cursor resumes after the encoded row"""
+        source = f'csv:{self.csv_path}'
+        first = next(lazy_paginate.lazy_paginate(2, source=source))
+        token = lazy_paginate.encode_cursor(first[-1])
+        rest = lazy_paginate.lazy_paginate(2, source=source, cursor=token)
+        self.assertEqual(next(rest)[0]['user_id'], 'id-11')
+
+    def test_unsupported_options_raise(self):
+        """Offset mode, other keys and other cursors are rejected"""
+        source = f'sqlite:{self.db_path}'
+        age_token = lazy_paginate.encode_cursor(
+            dict(zip(('user_id', 'name', 'email', 'age'), USERS[0])), 'age')
+        for options in ({'mode': 'offset'}, {'key': 'age'},
+                        {'mode': 'keyset', 'cursor': age_token}):
+            with self.subTest(**options):
+                with self.assertRaises(ValueError):
+                    next(lazy_paginate.lazy_paginate(2, source=source,
+                                                     **options))
+
+
+
+class TestSourceLifetime(SourceTestCase):
+    """Test case class for the RowSource interface and closing"""
+
+    def test_row_source_is_abstract(self):
+        """A source without stream and page_after cannot be built"""
+        with self.assertRaises(TypeError):
+            RowSource()
+
+    def test_spec_sources_closed(self):
+        """A SQLite source built from a spec closes with its generator"""
+        spec = f'sqlite:{self.db_path}'
+        def stop_early():
+            pages = lazy_paginate.lazy_paginate(2, source=spec)
+            next(pages)
+            pages.close()
+        runs = {
+            'exhausted': lambda: list(stream_users(source=spec)),
+            'stopped early': stop_early,
+            'prefetched': lambda: list(
+                lazy_paginate.lazy_paginate(2, source=spec, prefetch=2)),
+            'ages': lambda: list(stream_user_ages(source=spec)),
+        }
+        close = SQLiteSource.close
+        for name, run in runs.items():
+            with self.subTest(name), \
+                    patch.object(SQLiteSource, 'close', autospec=True,
+                                 side_effect=close) as closed:
+                run()
+                self.assertEqual(closed.call_count, 1)
+
+    def test_passed_source_left_open(self):
+        """A source passed in is left open for the caller"""
+        source = SQLiteSource(self.db_path)
+        list(stream_users(source=source))
+        self.assertIsNotNone(source._connection)
+        source.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Unit tests for the mergeable stream statistics"""
+
+import random
+import statistics
+import unittest
+from decimal import Decimal
+
+from stream_stats import (AgeStatistics, Histogram, HyperLogLog, KLLSketch,
+                          Moments)
+
+VALUES = [random.Random(7).randint(1, 120) for _ in range(20000)]
+PARTS = [VALUES[:3000], VALUES[3000:3001], [], VALUES[3001:]]
+
+
+def single_pass(cls, values, **options):
+    """Feed values into one summary"""
+    summary = cls(**options)
+    for value in values:
+        summary.update(value)
+    return summary
+
+
+def merged(cls, parts, **options):
+    """Feed each part into its own summary and merge them in order"""
+    total = cls(**options)
+    for part in parts:
+        total.merge(single_pass(cls, part, **options))
+    return total
+
+
+class TestMoments(unittest.TestCase):
+    """Test case class for Moments"""
+
+    def test_matches_statistics_module(self):
+        """Mean and variances match the exact values"""
+        moments = single_pass(Moments, VALUES)
+        self.assertEqual(moments.count, len(VALUES))
+        self.assertAlmostEqual(moments.mean, statistics.fmean(VALUES))
+        self.assertAlmostEqual(moments.variance, statistics.pvariance(VALUES))
+        self.assertAlmostEqual(moments.sample_variance,
+                               statistics.variance(VALUES))
+        self.assertEqual((moments.min, moments.max),
+                         (min(VALUES), max(VALUES)))
+
+    def test_merge_equals_single_pass(self):
+        """Merging partitions gives the single-pass result"""
+        whole, parts = single_pass(Moments, VALUES), merged(Moments, PARTS)
+        self.assertEqual(parts.count, whole.count)
+        self.assertAlmostEqual(parts.mean, whole.mean)
+        self.assertAlmostEqual(parts.variance, whole.variance)
+        self.assertEqual((parts.min, parts.max), (whole.min, whole.max))
+
+
+class TestKLLSketch(unittest.TestCase):
+    """Test case class for KLLSketch"""
+
+    def assertRankClose(self, sketch, q, tolerance=0.02):
+        """The estimate's rank is within tolerance of q"""
+        ordered = sorted(VALUES)
+        estimate = sketch.quantile(q)
+        low = sum(v < estimate for v in ordered) / len(ordered)
+        high = sum(v <= estimate for v in ordered) / len(ordered)
+        self.assertLessEqual(low - tolerance, q)
+        self.assertGreaterEqual(high + tolerance, q)
+
+    def test_merge_equals_single_pass(self):
+        """Merged and single-pass sketches both stay within the error"""
+        whole = single_pass(KLLSketch, VALUES, seed=1)
+        parts = merged(KLLSketch, PARTS, seed=1)
+        self.assertEqual(parts.count, whole.count)
+        for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+            with self.subTest(q=q):
+                self.assertRankClose(whole, q)
+                self.assertRankClose(parts, q)
+
+    def test_empty(self):
+        """An empty sketch has no quantiles"""
+        self.assertIsNone(KLLSketch().quantile(0.5))
+
+
+class TestHyperLogLog(unittest.TestCase):
+    """Test case class for HyperLogLog"""
+
+    def test_merge_equals_single_pass(self):
+        """Merged registers are identical to a single pass"""
+        whole = single_pass(HyperLogLog, VALUES)
+        parts = merged(HyperLogLog, PARTS)
+        self.assertEqual(parts.registers, whole.registers)
+        self.assertEqual(parts.count(), len(set(VALUES)))
+
+    def test_large_cardinality(self):
+        """The estimate is within a few standard errors"""
+        hll = single_pass(HyperLogLog, range(100000))
+        self.assertAlmostEqual(hll.count() / 100000, 1, delta=0.05)
+
+    def test_numeric_types_count_once(self):
+        """Equal ints, floats and Decimals are one distinct value"""
+        values = [67, 67.0, Decimal('67'), Decimal('67.00')]
+        self.assertEqual(single_pass(HyperLogLog, values).count(), 1)
+
+    def test_precision_mismatch(self):
+        """Sketches of different precision cannot be merged"""
+        with self.assertRaises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+
+class TestAgeStatistics(unittest.TestCase):
+    """Test case class for the combined summary"""
+
+    def test_merge_equals_single_pass(self):
+        """Exact parts of the summary match after merging"""
+        whole = AgeStatistics().update_all(VALUES).summary()
+        total = AgeStatistics()
+        for part in PARTS:
+            total.merge(AgeStatistics().update_all(part))
+        parts = total.summary()
+        for key in ('count', 'min', 'max', 'distinct', 'histogram'):
+            self.assertEqual(parts[key], whole[key])
+        self.assertAlmostEqual(parts['mean'], whole['mean'])
+        self.assertEqual(sum(count for *_, count in parts['histogram']),
+                         len(VALUES))
+
+    def test_histogram_bucket_mismatch(self):
+        """Histograms with different buckets cannot be merged"""
+        with self.assertRaises(ValueError):
+            Histogram(10).merge(Histogram(5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""Compact record type for user_data rows."""
+
+USER_COLUMNS = ('user_id', 'name', 'email', 'age')
+USER_SELECT = f"SELECT {', '.join(USER_COLUMNS)} FROM user_data"
+
+
+class UserRow:
+    """One user_data row stored in ``__slots__`` instead of a dict.
+
+    Supports ``row['age']`` lookups so code written against the dict rows
+    keeps working.
+
+    Example
+    -------
+    >>> user = UserRow.from_tuple(('00234e50', 'Dan', 'Molly59@gmail.com', 67))
+    >>> user.age, user['name']
+    (67, 'Dan')
+    """
+
+    __slots__ = USER_COLUMNS
+
+    def __init__(self, user_id, name, email, age):
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.age = age
+
+    @classmethod
+    def from_tuple(cls, row):
+        """Build a row from a ``(user_id, name, email, age)`` tuple."""
+        return cls(*row)
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def keys(self):
+        return USER_COLUMNS
+
+    def as_dict(self):
+        """Return the row as a plain dict."""
+        return {column: getattr(self, column) for column in USER_COLUMNS}
+
+    @classmethod
+    def from_dict(cls, row):
+        """Build a row from a dict with (at least) the user columns."""
+        return cls(row['user_id'], row['name'], row['email'], row['age'])
+
+    def __eq__(self, other):
+        if not isinstance(other, UserRow):
+            return NotImplemented
+        return all(getattr(self, c) == getattr(other, c) for c in USER_COLUMNS)
+
+    def __repr__(self):
+        return repr(self.as_dict())
+
+
+def convert_row(row, row_type):
+    """Convert a row dict to ``row_type`` ('dict', 'row' or 'tuple')."""
+    if row_type == 'dict':
+        return row
+    if row_type == 'row':
+        return UserRow.from_dict(row)
+    return tuple(row[column] for column in USER_COLUMNS)